@@ -13,7 +13,8 @@ extensions = [
 	#  'sphinx_autodoc_typehints',
 ]
 
-autodoc_typehints = 'both'
+autodoc_typehints = 'signature'
+autodoc_preserve_defaults = True
 
 intersphinx_mapping = {
 	'python': ('https://docs.python.org/3', None),
@@ -1,13 +1,14 @@
 from __future__ import annotations
 from typing import Collection, Iterable, Iterator, Hashable, \
-	ClassVar, TypeVar, Generic, Optional, Callable, Tuple, Any, Union, cast
+	ClassVar, TypeVar, Generic, Optional, Callable, List, Tuple, Any, Union, cast
 from abc import abstractmethod
 
+import collections
 import itertools
 import operator
 import builtins
 
-from ._util import Comparable, compare_next, compare_iter, sphinx_build
+from ._util import Comparable, compare_next, compare_iter, sphinx_build, try_c_ext
 
 T = TypeVar('T')
 K = TypeVar('K', bound=Comparable)
@@ -30,14 +31,11 @@ class Tree(Generic[K,V]):
 		self._sibling = sibling
 		return self
 
-	def merge(self, other:Optional[Tree[K,V]], down:bool) -> Tree[K,V]:
-		if other is None: return self
+	def merge(self, other:Tree[K,V], down:bool) -> Tree[K,V]:
 		if (self._key < other._key) == down:
 			self, other = other, self
-		assert self._sibling is None
-		assert other._sibling is None
-		other = Tree(other._key, other._value, other._child, self._child)
-		return Tree(self._key, self._value, other, None)
+		other = _tree(other._key, other._value, other._child, self._child)
+		return _tree(self._key, self._value, other, None)
 
 class Forest(Generic[K,V]):
 	__slots__ = ('_order', '_tree', '_next')
@@ -55,59 +53,138 @@ class Forest(Generic[K,V]):
 
 	def push(self:Optional[Forest[K,V]], down:bool,
 			order:int, tree:Tree[K,V]) -> Forest[K,V]:
-		if self is None:
-			return Forest(order, tree, None)
-		if order < self._order:
-			return Forest(order, tree, self)
-		if order > self._order:
-			return Forest(self._order, self._tree,
-				Forest.push(self._next, down, order, tree))
-		return Forest.push(self._next, down, order + 1,
-			self._tree.merge(tree, down))
+		# walk past the lower orders, carrying merged trees along
+		# while the orders match, then rebuild the skipped prefix
+		forest = self
+		while forest is not None and order == forest._order:
+			tree = forest._tree.merge(tree, down)
+			order += 1
+			forest = forest._next
+		if forest is None or order < forest._order:
+			return _forest(order, tree, forest)
+		spine = []
+		while forest is not None and order >= forest._order:
+			if order > forest._order:
+				spine.append(forest)
+			else:
+				tree = forest._tree.merge(tree, down)
+				order += 1
+			forest = forest._next
+		forest = _forest(order, tree, forest)
+		for node in reversed(spine):
+			forest = _forest(node._order, node._tree, forest)
+		return forest
 
 	def popbranch(self:Forest[K,V], down:bool) \
 			-> Tuple[int,Optional[Tree[K,V]],K,V,Optional[Forest[K,V]]]:
-		assert self._tree._sibling is None
-		if self._next is None:
-			return self._order - 1, self._tree._child, \
-				self._tree._key, self._tree._value, None
-		order, branch, key, value, forest = self._next.popbranch(down)
-		if (self._tree._key < key) != down:
-			return self._order - 1, self._tree._child, \
-				self._tree._key, self._tree._value, self._next
-		while order >= self._order:
-			assert branch is not None
-			tree = Tree(branch._key, branch._value, branch._child, None)
-			forest = Forest.push(forest, down, order, tree)
-			order, branch = order - 1, branch._sibling
-		return order, branch, key, value, \
-			Forest.push(forest, down, self._order, self._tree)
+		nodes = []
+		forest: Optional[Forest[K,V]] = self
+		while forest is not None:
+			nodes.append(forest)
+			forest = forest._next
+		# scan from the back so that ties go to the later tree
+		best = len(nodes) - 1
+		key = nodes[best]._tree._key
+		for index in range(best - 1, -1, -1):
+			if (nodes[index]._tree._key < key) != down:
+				best, key = index, nodes[index]._tree._key
+		node = nodes[best]
+		order, branch, value, forest = node._order - 1, \
+			node._tree._child, node._tree._value, node._next
+		# reinsert the trees in front of the popped one, together
+		# with the children of the popped tree of at least their order
+		for index in range(best - 1, -1, -1):
+			node = nodes[index]
+			while order >= node._order:
+				tree = _tree(branch._key, branch._value, branch._child, None)
+				forest = Forest.push(forest, down, order, tree)
+				order, branch = order - 1, branch._sibling
+			forest = Forest.push(forest, down, node._order, node._tree)
+		return order, branch, key, value, forest
 
 	def pop(self:Forest[K,V], down:bool) -> Tuple[K,V,Optional[Forest[K,V]]]:
 		order, branch, key, value, forest = self.popbranch(down)
 		while branch is not None:
-			tree = Tree(branch._key, branch._value, branch._child, None)
+			tree = _tree(branch._key, branch._value, branch._child, None)
 			forest = Forest.push(forest, down, order, tree)
 			order, branch = order - 1, branch._sibling
 		return key, value, forest
 
 	def merge(self:Optional[Forest[K,V]], other:Optional[Forest[K,V]],
 			down:bool) -> Optional[Forest[K,V]]:
-		if self is None: return other
-		if other is None: return self
-		if self._order < other._order:
-			return Forest(self._order, self._tree,
-				Forest.merge(self._next, other, down))
-		if self._order > other._order:
-			return Forest(other._order, other._tree,
-				Forest.merge(other._next, self, down))
-		forest = Forest.merge(self._next, other._next, down)
-		return Forest.push(forest, down, self._order + 1,
-			self._tree.merge(other._tree, down))
+		# zip the two forests by order, recording the nodes taken as is
+		# and the trees of equal order that have to be pushed back
+		# onto the merged remainder, then replay them in reverse
+		steps: List[Tuple[int,Tree[K,V],bool]] = []
+		while self is not None and other is not None:
+			if self._order > other._order:
+				self, other = other, self
+			if self._order < other._order:
+				steps.append((self._order, self._tree, False))
+				self = self._next
+			else:
+				steps.append((self._order + 1,
+					self._tree.merge(other._tree, down), True))
+				self, other = self._next, other._next
+		forest = other if self is None else self
+		for order, tree, carry in reversed(steps):
+			if carry: forest = Forest.push(forest, down, order, tree)
+			else: forest = _forest(order, tree, forest)
+		return forest
+
+# same as Tree(...), Forest(...) and cls(...) for heaps and views
+# without going through type.__call__ and __new__, these are
+# allocated on every step of push/pop/merge or every view call
+_new = object.__new__
+
+def _tree(key:K, value:V, child:Optional[Tree[K,V]],
+		sibling:Optional[Tree[K,V]]) -> Tree[K,V]:
+	self = _new(Tree)
+	self._key = key
+	self._value = value
+	self._child = child
+	self._sibling = sibling
+	return self
+
+def _forest(order:int, tree:Tree[K,V],
+		next:Optional[Forest[K,V]]) -> Forest[K,V]:
+	self = _new(Forest)
+	self._order = order
+	self._tree = tree
+	self._next = next
+	return self
+
+def _heap(cls:type, size:int, key:K, value:V,
+		forest:Optional[Forest[K,V]]) -> Any:
+	self = _new(cls)
+	self._size = size
+	self._key = key
+	self._value = value
+	self._forest = forest
+	return self
+
+def _view(cls:type, queue:PHeap[K,V], sorted:bool) -> Any:
+	self = _new(cls)
+	self._queue = queue
+	self._sorted = sorted
+	return self
+
+# Use the C extension for the forest if it is available
+if try_c_ext: # pragma: no cover
+	try:
+		from ._pheap_c import Tree, Forest # type: ignore
+		_tree, _forest = Tree, Forest
+	except ImportError:
+		import warnings
+		warnings.warn('failed to import C extension for PHeap', ImportWarning)
 
 class PHeapView(Generic[K,V,T], Collection[T]):
 	__slots__ = ('_queue', '_sorted')
 
+	_POP_COUNT: ClassVar[int] = 16
+	# 0 for keys, 1 for values, 2 for (key, value) items
+	_PROJECT: ClassVar[int] = 2
+
 	if not sphinx_build:
 		_queue: PHeap[K,V]
 		_sorted: bool
@@ -122,7 +199,7 @@ class PHeapView(Generic[K,V,T], Collection[T]):
 		r'''
 		Check if the item is in the heap
 
-		:math:`O(n)` or :math:`O(n\log{n})`
+		:math:`O(n)`
 
 		>>> 1 in pminheap([(1,'a'), (2,'b'), (3,'c')]).keys()
 		True
@@ -131,7 +208,8 @@ class PHeapView(Generic[K,V,T], Collection[T]):
 		>>> (1, 'a') in pminheap([(1,'a'), (2,'b'), (3,'c')]).items()
 		True
 		'''
-		return any(item == i for i in self)
+		# membership doesn't depend on the order, so never sort
+		return any(item == i for i in _view(type(self), self._queue, False))
 
 	def __len__(self):
 		r'''
@@ -148,33 +226,49 @@ class PHeapView(Generic[K,V,T], Collection[T]):
 		'''
 		return self._queue._size
 
-	def _iter_unsorted(self) -> Iterator[Tuple[K,V]]:
-		if self._queue._size == 0: return
-		yield self._queue._key, self._queue._value
-		forest = self._queue._forest
+	def _iter_unsorted(self) -> Iterator[Any]:
+		# yield what the view projects straight from the nodes, keys and
+		# values don't need a tuple built for every item just to unpack it
+		project = self._PROJECT
+		queue = self._queue
+		if queue._size == 0: return
+		if project == 0: yield queue._key
+		elif project == 1: yield queue._value
+		else: yield queue._key, queue._value
+		forest = queue._forest
 		stack:list[Tree[K,V]] = []
 		while forest is not None:
 			stack.append(forest._tree)
 			while stack:
-				item = stack.pop()
-				if isinstance(item, Tree):
-					yield item._key, item._value
-					if item._sibling is not None:
-						stack.append(item._sibling)
-					if item._child is not None:
-						stack.append(item._child)
+				tree: Optional[Tree[K,V]] = stack.pop()
+				# follow the children inline, same preorder as before
+				while tree is not None:
+					if project == 0: yield tree._key
+					elif project == 1: yield tree._value
+					else: yield tree._key, tree._value
+					if tree._sibling is not None:
+						stack.append(tree._sibling)
+					tree = tree._child
 			forest = forest._next
 
 	def _iter_sorted(self) -> Iterator[Tuple[K,V]]:
+		# pop the first few items so that early exits stay cheap, then
+		# sort the rest in one go rather than popping through the heap
 		queue = self._queue
-		while queue._size > 0:
+		for _ in range(self._POP_COUNT):
+			if queue._size == 0: return
 			key, value, queue = queue.pop()
 			yield key, value
-
-	def _iter(self) -> Iterator[Tuple[K,V]]:
-		if self._sorted:
+		items = list(_view(PHeapItems, queue, False))
+		items.sort(key=operator.itemgetter(0), reverse=queue._down)
+		yield from items
+
+	def _iter(self) -> Iterator[Any]:
+		if not self._sorted:
+			return self._iter_unsorted()
+		if self._PROJECT == 2:
 			return self._iter_sorted()
-		return self._iter_unsorted()
+		return map(operator.itemgetter(self._PROJECT), self._iter_sorted())
 
 	@abstractmethod
 	def __iter__(self) -> Iterator[T]:
@@ -193,12 +287,42 @@ class PHeapView(Generic[K,V,T], Collection[T]):
 		return NotImplemented
 
 class PHeapKeys(PHeapView[K,V,K]):
+	_PROJECT: ClassVar[int] = 0
+
 	def __iter__(self) -> Iterator[K]:
-		return (k for k, v in super()._iter())
+		return super()._iter()
+
+	def __contains__(self, key) -> bool:
+		queue = self._queue
+		if queue._size == 0: return False
+		down = queue._down
+		try:
+			if key == queue._key: return True
+			if (queue._key < key) if down else (key < queue._key): return False
+			# trees are heap ordered, so skip the children of any
+			# node that already comes after the key
+			stack:list[Tree[K,V]] = []
+			forest = queue._forest
+			while forest is not None:
+				stack.append(forest._tree)
+				forest = forest._next
+			while stack:
+				tree: Optional[Tree[K,V]] = stack.pop()
+				while tree is not None:
+					if tree._sibling is not None:
+						stack.append(tree._sibling)
+					if key == tree._key: return True
+					if (tree._key < key) if down else (key < tree._key): break
+					tree = tree._child
+			return False
+		except TypeError:
+			return super().__contains__(key)
 
 class PHeapValues(PHeapView[K,V,V]):
+	_PROJECT: ClassVar[int] = 1
+
 	def __iter__(self) -> Iterator[V]:
-		return (v for k, v in super()._iter())
+		return super()._iter()
 
 class PHeapItems(PHeapView[K,V,Tuple[K,V]]):
 	def __iter__(self) -> Iterator[Tuple[K,V]]:
@@ -243,13 +367,15 @@ class PHeap(Generic[K,V], Collection[K], Hashable):
 	pminheap([(1, 'a'), (2, 'b'), (2, 'b'), (3, 'c')])
 	'''
 
-	__slots__ = ('_size', '_key', '_value', '_forest')
+	# _hash is left unset until the first __hash__ call
+	__slots__ = ('_size', '_key', '_value', '_forest', '_hash')
 
 	if not sphinx_build:
 		_size: int
 		_key: K
 		_value: V
 		_forest: Optional[Forest[K,V]]
+		_hash: int
 
 	_name: ClassVar[str] = cast(Any, None)
 	_down: ClassVar[bool] = cast(Any, None)
@@ -275,13 +401,13 @@ class PHeap(Generic[K,V], Collection[K], Hashable):
 		pmaxheap([(3, 'c'), (2, 'b'), (1, 'a')])
 		'''
 		if self._size == 0:
-			return type(self)(1, key, value, None)
+			return _heap(type(self), 1, key, value, None)
 		if (key < self._key) != self._down:
 			k1, v1, k2, v2 = key, value, self._key, self._value
 		else:
 			k2, v2, k1, v1 = key, value, self._key, self._value
-		return type(self)(self._size + 1, k1, v1,
-			Forest.push(self._forest, self._down, 0, Tree(k2, v2, None, None)))
+		return _heap(type(self), self._size + 1, k1, v1,
+			Forest.push(self._forest, self._down, 0, _tree(k2, v2, None, None)))
 
 	def pop(self) -> Tuple[K,V,PHeap[K,V]]:
 		r'''
@@ -305,7 +431,7 @@ class PHeap(Generic[K,V], Collection[K], Hashable):
 		if self._forest is None:
 			return self._key, self._value, self._empty
 		key, value, forest = self._forest.pop(self._down)
-		return self._key, self._value, type(self)(self._size - 1, key, value, forest)
+		return self._key, self._value, _heap(type(self), self._size - 1, key, value, forest)
 
 	def merge(self, other:PHeapLike[K,V]) -> PHeap[K,V]:
 		r'''
@@ -326,8 +452,9 @@ class PHeap(Generic[K,V], Collection[K], Hashable):
 			self, other = other, self
 		forest = Forest.merge(self._forest, other._forest, self._down)
 		forest = Forest.push(forest, self._down, 0,
-			Tree(other._key, other._value, None, None))
-		return type(self)(self._size + other._size, self._key, self._value, forest)
+			_tree(other._key, other._value, None, None))
+		return _heap(type(self),
+			self._size + other._size, self._key, self._value, forest)
 
 	__add__ = merge
 
@@ -367,7 +494,7 @@ class PHeap(Generic[K,V], Collection[K], Hashable):
 		return self._size != 0
 
 	def __contains__(self, key) -> bool:
-		return key in PHeapKeys(self, False)
+		return key in _view(PHeapKeys, self, False)
 
 	def __repr__(self) -> str:
 		return '{}({})'.format(self._name, list(self.items()))
@@ -390,7 +517,7 @@ class PHeap(Generic[K,V], Collection[K], Hashable):
 		>>> list(pmaxheap([(1,'a'), (2,'b'), (3,'c')]).items())
 		[(3, 'c'), (2, 'b'), (1, 'a')]
 		'''
-		return PHeapItems(self, sorted)
+		return _view(PHeapItems, self, sorted)
 
 	def keys(self, sorted:bool=True) -> PHeapKeys[K,V]:
 		r'''
@@ -410,7 +537,7 @@ class PHeap(Generic[K,V], Collection[K], Hashable):
 		>>> list(pmaxheap([(1,'a'), (2,'b'), (3,'c')]).keys())
 		[3, 2, 1]
 		'''
-		return PHeapKeys(self, sorted)
+		return _view(PHeapKeys, self, sorted)
 
 	def values(self, sorted:bool=True) -> PHeapValues[K,V]:
 		r'''
@@ -430,7 +557,7 @@ class PHeap(Generic[K,V], Collection[K], Hashable):
 		>>> list(pmaxheap([(1,'a'), (2,'b'), (3,'c')]).values())
 		['c', 'b', 'a']
 		'''
-		return PHeapValues(self, sorted)
+		return _view(PHeapValues, self, sorted)
 
 	def __iter__(self) -> Iterator[K]:
 		r'''
@@ -447,26 +574,45 @@ class PHeap(Generic[K,V], Collection[K], Hashable):
 		>>> list(pmaxheap([(1,'a'), (2,'b'), (3,'c')]).keys())
 		[3, 2, 1]
 		'''
-		return iter(PHeapKeys(self, True))
+		return iter(_view(PHeapKeys, self, True))
 
 	@classmethod
 	def _fromitems(cls, items:PHeapLike[K,V]) -> PHeap[K,V]:
 		if isinstance(items, PHeap):
 			if items._down == cls._down: return items
 			return cls._fromitems(items.items(sorted=False))
-		size, forest = 0, None
-		for key, value in items:
-			forest = Forest.push(forest, cls._down, 0,
-				Tree(key, value, None, None))
-			size += 1
-		if forest is None:
+		trees = [_tree(key, value, None, None) for key, value in items]
+		if not trees:
 			return cls._empty
-		key, value, forest = forest.pop(cls._down)
-		return cls(size, key, value, forest)
-
-	def _iter_sort_values(self) -> Iterator[Tuple[K,V]]:
-		for k, vs in itertools.groupby(self.items(), key=operator.itemgetter(0)):
-			yield from sorted(vs, key=operator.itemgetter(1))
+		# merge neighbouring trees level by level, an odd tree left over
+		# at the end of a level is the forest's tree of that order,
+		# same as pushing the items one by one but without the carries
+		size, down, order, spine = len(trees), cls._down, 0, []
+		while trees:
+			if len(trees) & 1:
+				spine.append((order, trees.pop()))
+			pairs = iter(trees)
+			trees = [x.merge(y, down) for x, y in zip(pairs, pairs)]
+			order += 1
+		forest = None
+		for order, tree in reversed(spine):
+			forest = _forest(order, tree, forest)
+		key, value, forest = forest.pop(down)
+		return _heap(cls, size, key, value, forest)
+
+	def _sort_values(self) -> List[Tuple[K,V]]:
+		# sorting the tuples orders by key, comparing values only between
+		# equal keys, sorting on the key alone first is cheaper since the
+		# tuple sort then only has short runs of equal keys to fix up,
+		# a last stable sort flips max-heaps to descending keys while
+		# leaving the values ascending
+		key = operator.itemgetter(0)
+		items = list(_view(PHeapItems, self, False))
+		items.sort(key=key)
+		items.sort()
+		if self._down:
+			items.sort(key=key, reverse=True)
+		return items
 
 	def _iter_group_values(self) -> Iterator[Tuple[K,Iterator[Tuple[K,V]]]]:
 		return itertools.groupby(self.items(), key=operator.itemgetter(0))
@@ -481,9 +627,15 @@ class PHeap(Generic[K,V], Collection[K], Hashable):
 				return 0
 			if len(self) != len(other):
 				return 1
+			try:
+				if self._hash != other._hash:
+					return 1
+			except AttributeError: pass
+			if self._key is not other._key and self._key != other._key:
+				return 1
 		try:
-			return compare_iter(self._iter_sort_values(),
-				other._iter_sort_values(), equality)
+			return compare_iter(self._sort_values(),
+				other._sort_values(), equality)
 		except TypeError as err:
 			if not equality: raise
 		xiter = self._iter_group_values()
@@ -623,19 +775,24 @@ class PHeap(Generic[K,V], Collection[K], Hashable):
 	def __hash__(self) -> int:
 		r'''
 		Calculate the hash of the heap.
+		The result is cached after the first call.
 
 		:math:`O(n)`
 
-		:raises TypeError: if values are not comparable
+		:raises TypeError: if keys or values are not hashable
 
 		>>> x1 = pminheap([(1,'a'), (2,'b'), (3,'c')])
-		>>> x2 = pminheap([(1,'a'), (2,'b'), (3,'c')])
+		>>> x2 = pminheap([(3,'c'), (2,'b'), (1,'a')])
 		>>> hash(x1) == hash(x2)
 		True
 		'''
-		h = hash(self._name)
-		for k, vs in itertools.groupby(self.items(), key=operator.itemgetter(0)):
-			h = hash((h, k, tuple(sorted(vs))))
+		try: return self._hash
+		except AttributeError: pass
+		# hash the multiset of items, which doesn't depend on the order
+		# they are stored in, so equal heaps hash the same without sorting
+		counts = collections.Counter(self.items(False))
+		h = hash((self._name, frozenset(counts.items())))
+		self._hash = h
 		return h
 
 	def __reduce__(self):
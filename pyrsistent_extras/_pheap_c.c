@@ -0,0 +1,495 @@
+#define PY_SSIZE_T_CLEAN
+#include <Python.h>
+#include <structmember.h>
+
+#include <stdbool.h>
+#include <assert.h>
+
+/*
+Binomial forest used by the persistent heaps.
+
+This only replaces the Tree and Forest helper classes of _pheap.py,
+the heap classes themselves stay in Python. The functions here follow
+the Python implementation step by step, so both build identical forests.
+
+Naming conventions
+------------------
+<typename>_* - Instance methods of types. For examle HForest_push(...)
+H<typename>  - Heap related types, considered private
+
+Empty child, sibling and next pointers hold None rather than NULL (see
+HTree_NONE), so a NULL result only ever signals an error.
+*/
+
+// {{{ typedef
+
+typedef struct HTree {
+	PyObject_HEAD
+	PyObject* key;
+	PyObject* value;
+	struct HTree* child;
+	struct HTree* sibling;
+} HTree;
+
+typedef struct HForest {
+	PyObject_HEAD
+	Py_ssize_t order;
+	HTree* tree;
+	struct HForest* next;
+} HForest;
+
+// a forest holds at most one tree per order, and a tree of order k
+// holds 2**k items, so this bounds the length of any forest
+#define MAX_ORDER ((int)(sizeof(size_t) * 8))
+
+static PyTypeObject HTreeType;
+static PyTypeObject HForestType;
+
+// members holding None instead of NULL can be T_OBJECT_EX, which the
+// interpreter specialises attribute access for, unlike T_OBJECT
+#define HTree_NONE ((HTree*)Py_None)
+#define HForest_NONE ((HForest*)Py_None)
+
+// recently freed nodes are kept around for reuse, every push, pop
+// and merge allocates and drops a logarithmic number of them
+#define MAX_FREE 256
+
+static HTree* HTree_freeList[MAX_FREE];
+static int HTree_freeCount = 0;
+
+static HForest* HForest_freeList[MAX_FREE];
+static int HForest_freeCount = 0;
+
+// }}}
+
+// {{{ utilities
+
+static void* PObj_IncRef(void* obj) {
+	Py_INCREF(obj);
+	return obj;
+}
+
+// the types are reachable from python, so forests built by hand can
+// break the invariants the fixed size arrays below rely on
+static void* PObj_malformed(void) {
+	PyErr_SetString(PyExc_ValueError, "malformed forest");
+	return NULL;
+}
+
+// compare keys the way the heap orders them: -1 on error,
+// otherwise whether (x < y) != down, ie. x should come first
+static int PObj_before(PyObject* x, PyObject* y, bool down) {
+	// exact floats are compared directly, skipping the rich comparison
+	if(PyFloat_CheckExact(x) && PyFloat_CheckExact(y))
+		return (PyFloat_AS_DOUBLE(x) < PyFloat_AS_DOUBLE(y)) != down;
+	// same for exact ints that fit in a long long
+	if(PyLong_CheckExact(x) && PyLong_CheckExact(y)) {
+		int xover, yover;
+		long long a = PyLong_AsLongLongAndOverflow(x, &xover);
+		long long b = PyLong_AsLongLongAndOverflow(y, &yover);
+		if(!xover && !yover) return (a < b) != down;
+	}
+	int less = PyObject_RichCompareBool(x, y, Py_LT);
+	if(less < 0) return -1;
+	return (less != 0) != down;
+}
+
+// }}}
+
+// {{{ HTree
+
+static HTree* HTree_make(
+	PyObject* key,
+	PyObject* value,
+	HTree* child,
+	HTree* sibling
+) {
+	HTree* tree;
+	if(HTree_freeCount > 0) {
+		tree = HTree_freeList[--HTree_freeCount];
+		PyObject_Init((PyObject*)tree, &HTreeType);
+	} else {
+		tree = PyObject_GC_New(HTree, &HTreeType);
+		if(tree == NULL) return NULL;
+	}
+	tree->key = PObj_IncRef(key);
+	tree->value = PObj_IncRef(value);
+	tree->child = PObj_IncRef(child);
+	tree->sibling = PObj_IncRef(sibling);
+	PyObject_GC_Track(tree);
+	return tree;
+}
+
+static int HTree_traverse(HTree* self, visitproc visit, void* arg) {
+	Py_VISIT(self->key);
+	Py_VISIT(self->value);
+	Py_VISIT(self->child);
+	Py_VISIT(self->sibling);
+	return 0;
+}
+
+static int HTree_clear(HTree* self) {
+	Py_CLEAR(self->key);
+	Py_CLEAR(self->value);
+	Py_CLEAR(self->child);
+	Py_CLEAR(self->sibling);
+	return 0;
+}
+
+static void HTree_dealloc(HTree* self) {
+	PyObject_GC_UnTrack(self);
+	HTree_clear(self);
+	if(HTree_freeCount < MAX_FREE)
+		HTree_freeList[HTree_freeCount++] = self;
+	else PyObject_GC_Del(self);
+}
+
+static HTree* HTree_merge(HTree* self, HTree* other, bool down) {
+	int before = PObj_before(self->key, other->key, down);
+	if(before < 0) return NULL;
+	if(!before) { HTree* temp = self; self = other; other = temp; }
+	assert(self->sibling == HTree_NONE);
+	assert(other->sibling == HTree_NONE);
+	HTree* child = HTree_make(other->key, other->value,
+		other->child, self->child);
+	if(child == NULL) return NULL;
+	HTree* tree = HTree_make(self->key, self->value, child, HTree_NONE);
+	Py_DECREF(child);
+	return tree;
+}
+
+static HTree* HTree_new(PyTypeObject* type, PyObject* args, PyObject* kwargs) {
+	PyObject *key, *value, *child, *sibling;
+	static char* kwlist[] = { "key", "value", "child", "sibling", NULL };
+	if(!PyArg_ParseTupleAndKeywords(args, kwargs, "OOOO:Tree",
+		kwlist, &key, &value, &child, &sibling)) return NULL;
+	if((child != Py_None && !PyObject_TypeCheck(child, &HTreeType))
+			|| (sibling != Py_None && !PyObject_TypeCheck(sibling, &HTreeType))) {
+		PyErr_SetString(PyExc_TypeError, "expected Tree or None");
+		return NULL;
+	}
+	return HTree_make(key, value, (HTree*)child, (HTree*)sibling);
+}
+
+static PyObject* HTree_mergeN(HTree* self, PyObject* args) {
+	PyObject* other; int down;
+	if(!PyArg_ParseTuple(args, "O!p:merge", &HTreeType, &other, &down))
+		return NULL;
+	return (PyObject*)HTree_merge(self, (HTree*)other, down);
+}
+
+// }}}
+
+// {{{ HForest
+
+static HForest* HForest_make(Py_ssize_t order, HTree* tree, HForest* next) {
+	HForest* forest;
+	if(HForest_freeCount > 0) {
+		forest = HForest_freeList[--HForest_freeCount];
+		PyObject_Init((PyObject*)forest, &HForestType);
+	} else {
+		forest = PyObject_GC_New(HForest, &HForestType);
+		if(forest == NULL) return NULL;
+	}
+	forest->order = order;
+	forest->tree = PObj_IncRef(tree);
+	forest->next = PObj_IncRef(next);
+	PyObject_GC_Track(forest);
+	return forest;
+}
+
+static int HForest_traverse(HForest* self, visitproc visit, void* arg) {
+	Py_VISIT(self->tree);
+	Py_VISIT(self->next);
+	return 0;
+}
+
+static int HForest_clear(HForest* self) {
+	Py_CLEAR(self->tree);
+	Py_CLEAR(self->next);
+	return 0;
+}
+
+static void HForest_dealloc(HForest* self) {
+	PyObject_GC_UnTrack(self);
+	HForest_clear(self);
+	if(HForest_freeCount < MAX_FREE)
+		HForest_freeList[HForest_freeCount++] = self;
+	else PyObject_GC_Del(self);
+}
+
+static HForest* HForest_push(
+	HForest* self,
+	bool down,
+	Py_ssize_t order,
+	HTree* tree
+) {
+	HForest* spine[MAX_ORDER]; int count = 0;
+	HForest* forest = self;
+	Py_INCREF(tree);
+	while(forest != HForest_NONE && order >= forest->order) {
+		if(order > forest->order) {
+			if(count >= MAX_ORDER) {
+				Py_DECREF(tree);
+				return PObj_malformed();
+			}
+			spine[count++] = forest;
+		} else {
+			HTree* merged = HTree_merge(forest->tree, tree, down);
+			Py_DECREF(tree);
+			if(merged == NULL) return NULL;
+			tree = merged;
+			order += 1;
+		}
+		forest = forest->next;
+	}
+	forest = HForest_make(order, tree, forest);
+	Py_DECREF(tree);
+	while(forest != NULL && count > 0) {
+		HForest* node = spine[--count];
+		HForest* next = HForest_make(node->order, node->tree, forest);
+		Py_DECREF(forest);
+		forest = next;
+	}
+	return forest;
+}
+
+// push the children of a popped tree of at least the given order,
+// returns the new forest and updates order and branch to the rest
+static HForest* HForest_pushBranch(
+	HForest* forest,
+	bool down,
+	Py_ssize_t* order,
+	HTree** branch,
+	Py_ssize_t until
+) {
+	while(*order >= until) {
+		if(*branch == HTree_NONE) {
+			Py_DECREF(forest);
+			return PObj_malformed();
+		}
+		HTree* tree = HTree_make((*branch)->key,
+			(*branch)->value, (*branch)->child, HTree_NONE);
+		if(tree == NULL) { Py_DECREF(forest); return NULL; }
+		HForest* next = HForest_push(forest, down, *order, tree);
+		Py_DECREF(tree);
+		Py_DECREF(forest);
+		if(next == NULL) return NULL;
+		forest = next;
+		*order -= 1;
+		*branch = (*branch)->sibling;
+	}
+	return forest;
+}
+
+static PyObject* HForest_pop(HForest* self, PyObject* arg) {
+	int down = PyObject_IsTrue(arg);
+	if(down < 0) return NULL;
+	HForest* nodes[MAX_ORDER]; int count = 0;
+	for(HForest* node = self; node != HForest_NONE; node = node->next) {
+		if(count >= MAX_ORDER) return PObj_malformed();
+		assert(node->tree->sibling == HTree_NONE);
+		nodes[count++] = node;
+	}
+	// scan from the back so that ties go to the later tree
+	int best = count - 1;
+	for(int index = best - 1; index >= 0; --index) {
+		int before = PObj_before(nodes[index]->tree->key,
+			nodes[best]->tree->key, down);
+		if(before < 0) return NULL;
+		if(before) best = index;
+	}
+	HForest* node = nodes[best];
+	Py_ssize_t order = node->order - 1;
+	HTree* branch = node->tree->child;
+	HForest* forest = PObj_IncRef(node->next);
+	// reinsert the trees in front of the popped one, together
+	// with the children of the popped tree of at least their order
+	for(int index = best - 1; index >= 0; --index) {
+		forest = HForest_pushBranch(forest, down,
+			&order, &branch, nodes[index]->order);
+		if(forest == NULL) return NULL;
+		HForest* next = HForest_push(forest, down,
+			nodes[index]->order, nodes[index]->tree);
+		Py_DECREF(forest);
+		if(next == NULL) return NULL;
+		forest = next;
+	}
+	forest = HForest_pushBranch(forest, down, &order, &branch, 0);
+	if(forest == NULL) return NULL;
+	assert(branch == HTree_NONE);
+	PyObject* result = PyTuple_Pack(3,
+		node->tree->key, node->tree->value, forest);
+	Py_DECREF(forest);
+	return result;
+}
+
+static HForest* HForest_merge(HForest* self, HForest* other, bool down) {
+	// zip the two forests by order, recording the nodes taken as is
+	// and the trees of equal order that have to be pushed back
+	// onto the merged remainder, then replay them in reverse
+	struct { Py_ssize_t order; HTree* tree; bool carry; } steps[2 * MAX_ORDER];
+	int count = 0;
+	HForest* forest = NULL;
+	while(self != HForest_NONE && other != HForest_NONE) {
+		if(self->order > other->order) {
+			HForest* temp = self; self = other; other = temp;
+		}
+		if(count >= 2 * MAX_ORDER) {
+			PObj_malformed();
+			goto err;
+		}
+		if(self->order < other->order) {
+			steps[count].order = self->order;
+			steps[count].tree = PObj_IncRef(self->tree);
+			steps[count++].carry = false;
+			self = self->next;
+		} else {
+			HTree* tree = HTree_merge(self->tree, other->tree, down);
+			if(tree == NULL) goto err;
+			steps[count].order = self->order + 1;
+			steps[count].tree = tree;
+			steps[count++].carry = true;
+			self = self->next;
+			other = other->next;
+		}
+	}
+	forest = PObj_IncRef(self == HForest_NONE ? other : self);
+	while(count > 0) {
+		--count;
+		HForest* next = steps[count].carry
+			? HForest_push(forest, down, steps[count].order, steps[count].tree)
+			: HForest_make(steps[count].order, steps[count].tree, forest);
+		Py_DECREF(steps[count].tree);
+		Py_DECREF(forest);
+		forest = next;
+		if(forest == NULL) goto err;
+	}
+	return forest;
+	err:
+	while(count > 0) Py_DECREF(steps[--count].tree);
+	return NULL;
+}
+
+static HForest* HForest_new(PyTypeObject* type, PyObject* args, PyObject* kwargs) {
+	Py_ssize_t order; PyObject *tree, *next;
+	static char* kwlist[] = { "order", "tree", "next", NULL };
+	if(!PyArg_ParseTupleAndKeywords(args, kwargs, "nO!O:Forest",
+		kwlist, &order, &HTreeType, &tree, &next)) return NULL;
+	if(next != Py_None && !PyObject_TypeCheck(next, &HForestType)) {
+		PyErr_SetString(PyExc_TypeError, "expected Forest or None");
+		return NULL;
+	}
+	// orders strictly increase along the spine and stay below MAX_ORDER
+	if(order < 0 || order >= MAX_ORDER
+			|| (next != Py_None && ((HForest*)next)->order <= order))
+		return PObj_malformed();
+	return HForest_make(order, (HTree*)tree, (HForest*)next);
+}
+
+static bool HForest_parseArg(PyObject* arg, HForest** forest) {
+	if(arg == Py_None || PyObject_TypeCheck(arg, &HForestType)) {
+		*forest = (HForest*)arg;
+		return true;
+	}
+	PyErr_SetString(PyExc_TypeError, "expected Forest or None");
+	return false;
+}
+
+static PyObject* HForest_pushN(PyObject* cls, PyObject* args) {
+	PyObject *arg, *tree; int down; Py_ssize_t order; HForest* forest;
+	if(!PyArg_ParseTuple(args, "OpnO!:push",
+		&arg, &down, &order, &HTreeType, &tree)) return NULL;
+	if(!HForest_parseArg(arg, &forest)) return NULL;
+	return (PyObject*)HForest_push(forest, down, order, (HTree*)tree);
+}
+
+static PyObject* HForest_mergeN(PyObject* cls, PyObject* args) {
+	PyObject *arg1, *arg2; int down; HForest *forest1, *forest2;
+	if(!PyArg_ParseTuple(args, "OOp:merge", &arg1, &arg2, &down)) return NULL;
+	if(!HForest_parseArg(arg1, &forest1)) return NULL;
+	if(!HForest_parseArg(arg2, &forest2)) return NULL;
+	return (PyObject*)HForest_merge(forest1, forest2, down);
+}
+
+// }}}
+
+// {{{ type def
+
+static PyMethodDef HTree_methods[] = {
+	{"merge", (PyCFunction)HTree_mergeN, METH_VARARGS, NULL},
+	{NULL}
+};
+
+static PyMemberDef HTree_members[] = {
+	{"_key", T_OBJECT_EX, offsetof(HTree, key), READONLY, NULL},
+	{"_value", T_OBJECT_EX, offsetof(HTree, value), READONLY, NULL},
+	{"_child", T_OBJECT_EX, offsetof(HTree, child), READONLY, NULL},
+	{"_sibling", T_OBJECT_EX, offsetof(HTree, sibling), READONLY, NULL},
+	{NULL}
+};
+
+static PyTypeObject HTreeType = {
+	PyVarObject_HEAD_INIT(NULL, 0)
+	.tp_name      = "pyrsistent_extras._pheap_c.Tree",
+	.tp_basicsize = sizeof(HTree),
+	.tp_dealloc   = (destructor)HTree_dealloc,
+	.tp_flags     = Py_TPFLAGS_DEFAULT | Py_TPFLAGS_HAVE_GC,
+	.tp_traverse  = (traverseproc)HTree_traverse,
+	.tp_clear     = (inquiry)HTree_clear,
+	.tp_methods   = HTree_methods,
+	.tp_members   = HTree_members,
+	.tp_new       = (newfunc)HTree_new,
+};
+
+static PyMethodDef HForest_methods[] = {
+	{"push", (PyCFunction)HForest_pushN, METH_VARARGS | METH_STATIC, NULL},
+	{"merge", (PyCFunction)HForest_mergeN, METH_VARARGS | METH_STATIC, NULL},
+	{"pop", (PyCFunction)HForest_pop, METH_O, NULL},
+	{NULL}
+};
+
+static PyMemberDef HForest_members[] = {
+	{"_order", T_PYSSIZET, offsetof(HForest, order), READONLY, NULL},
+	{"_tree", T_OBJECT_EX, offsetof(HForest, tree), READONLY, NULL},
+	{"_next", T_OBJECT_EX, offsetof(HForest, next), READONLY, NULL},
+	{NULL}
+};
+
+static PyTypeObject HForestType = {
+	PyVarObject_HEAD_INIT(NULL, 0)
+	.tp_name      = "pyrsistent_extras._pheap_c.Forest",
+	.tp_basicsize = sizeof(HForest),
+	.tp_dealloc   = (destructor)HForest_dealloc,
+	.tp_flags     = Py_TPFLAGS_DEFAULT | Py_TPFLAGS_HAVE_GC,
+	.tp_traverse  = (traverseproc)HForest_traverse,
+	.tp_clear     = (inquiry)HForest_clear,
+	.tp_methods   = HForest_methods,
+	.tp_members   = HForest_members,
+	.tp_new       = (newfunc)HForest_new,
+};
+
+// }}}
+
+// {{{ module def
+
+static struct PyModuleDef moduleDef = {
+	PyModuleDef_HEAD_INIT,
+	.m_name = "pyrsistent_extras._pheap_c",
+	.m_doc  = "persistent heap c implementation",
+	.m_size = -1,
+};
+
+PyMODINIT_FUNC PyInit__pheap_c() {
+	if(PyType_Ready(&HTreeType) < 0) return NULL;
+	if(PyType_Ready(&HForestType) < 0) return NULL;
+	PyObject* module = PyModule_Create(&moduleDef);
+	if(module == NULL) return NULL;
+	PyModule_AddObject(module, "Tree", PObj_IncRef(&HTreeType));
+	PyModule_AddObject(module, "Forest", PObj_IncRef(&HForestType));
+	return module;
+}
+
+// }}}
+
+// vim: set foldmethod=marker foldlevel=0 nocindent:
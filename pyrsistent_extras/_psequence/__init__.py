@@ -2,10 +2,6 @@ from __future__ import annotations
 from collections.abc import Sequence, Hashable, MutableSequence
 from typing import TypeVar, Tuple
 
-import os
-import platform
-import builtins
-
 from .._util import sphinx_build, try_c_ext
 
 use_c_ext = False
@@ -14,7 +10,7 @@ if try_c_ext: # pragma: no cover
 	try:
 		from ._c_ext import PSequence, Evolver # type: ignore
 		use_c_ext = True
-	except ImportError as err:
+	except ImportError:
 		import warnings
 		warnings.warn('failed to import C extension for PSequence', ImportWarning)
 
@@ -1,7 +1,11 @@
 from __future__ import annotations
 from typing import Sequence, Generic, Iterable, Iterator, TypeVar, Union, \
 	List, Tuple, Optional, overload
-from abc import ABCMeta, abstractmethod
+
+import sys
+
+if sys.version_info >= (3, 9):
+	from types import GenericAlias
 
 T = TypeVar('T')
 
@@ -74,7 +78,15 @@ class PSequenceBase(Generic[T]):
 	psequence([1, 99, 3])
 	'''
 
-	@abstractmethod
+	# without slots here every tree node would carry a __dict__,
+	# __weakref__ keeps them weakly referenceable like the C extension
+	__slots__ = ('__weakref__',)
+
+	if sys.version_info >= (3, 9):
+		# skip the typing.Generic subscript machinery at runtime,
+		# type checkers still see the Generic[T] base
+		__class_getitem__ = classmethod(GenericAlias)
+
 	def __eq__(self, other) -> bool:
 		r'''
 		Return self == other
@@ -86,8 +98,8 @@ class PSequenceBase(Generic[T]):
 		>>> psequence([1,2,3]) == psequence([2,3,4])
 		False
 		'''
+		raise NotImplementedError
 
-	@abstractmethod
 	def __ne__(self, other) -> bool:
 		r'''
 		Return self != other
@@ -99,8 +111,8 @@ class PSequenceBase(Generic[T]):
 		>>> psequence([1,2,3]) != psequence([2,3,4])
 		True
 		'''
+		raise NotImplementedError
 
-	@abstractmethod
 	def __le__(self, other) -> bool:
 		r'''
 		Return self <= other
@@ -114,8 +126,8 @@ class PSequenceBase(Generic[T]):
 		>>> psequence([1,2,3]) <= psequence([0,1,2])
 		False
 		'''
+		raise NotImplementedError
 
-	@abstractmethod
 	def __lt__(self, other) -> bool:
 		r'''
 		Return self < other
@@ -129,8 +141,8 @@ class PSequenceBase(Generic[T]):
 		>>> psequence([1,2,3]) < psequence([0,1,2])
 		False
 		'''
+		raise NotImplementedError
 
-	@abstractmethod
 	def __ge__(self, other) -> bool:
 		r'''
 		Return self >= other
@@ -144,8 +156,8 @@ class PSequenceBase(Generic[T]):
 		>>> psequence([1,2,3]) >= psequence([0,1,2])
 		True
 		'''
+		raise NotImplementedError
 
-	@abstractmethod
 	def __gt__(self, other) -> bool:
 		r'''
 		Return self > other
@@ -159,8 +171,8 @@ class PSequenceBase(Generic[T]):
 		>>> psequence([1,2,3]) > psequence([0,1,2])
 		True
 		'''
+		raise NotImplementedError
 
-	@abstractmethod
 	def extendleft(self, other:Union[PSequenceBase[T], Iterable[T]]) -> PSequenceBase[T]:
 		r'''
 		Concatenate two sequences
@@ -172,8 +184,8 @@ class PSequenceBase(Generic[T]):
 		>>> psequence([1,2]).extendleft([3,4])
 		psequence([3, 4, 1, 2])
 		'''
+		raise NotImplementedError
 
-	@abstractmethod
 	def extendright(self, other:Union[PSequenceBase[T], Iterable[T]]) -> PSequenceBase[T]:
 		r'''
 		Concatenate two sequences
@@ -189,6 +201,7 @@ class PSequenceBase(Generic[T]):
 		>>> psequence([1,2]) + [3,4]
 		psequence([1, 2, 3, 4])
 		'''
+		raise NotImplementedError
 
 	extend = extendright
 
@@ -211,7 +224,6 @@ class PSequenceBase(Generic[T]):
 	def __getitem__(self, index:int) -> T: ...
 	@overload
 	def __getitem__(self, index:slice) -> PSequenceBase[T]: ...
-	@abstractmethod
 	def __getitem__(self, index):
 		r'''
 		Get the element(s) at the specified position(s)
@@ -233,12 +245,12 @@ class PSequenceBase(Generic[T]):
 		...
 		IndexError: ...
 		'''
+		raise NotImplementedError
 
 	@overload
 	def set(self, index:int, value:T) -> PSequenceBase[T]: ...
 	@overload
 	def set(self, index:slice, value:Iterable[T]) -> PSequenceBase[T]: ...
-	@abstractmethod
 	def set(self, index, value):
 		r'''
 		Replace the element(s) at the specified position(s)
@@ -260,8 +272,8 @@ class PSequenceBase(Generic[T]):
 		...
 		IndexError: ...
 		'''
+		raise NotImplementedError
 
-	@abstractmethod
 	def mset(self, *values:Tuple[int,T]) -> PSequenceBase[T]:
 		r'''
 		Replace multiple elements
@@ -279,8 +291,8 @@ class PSequenceBase(Generic[T]):
 		...
 		IndexError: ...
 		'''
+		raise NotImplementedError
 
-	@abstractmethod
 	def insert(self, index:int, value:T) -> PSequenceBase[T]:
 		r'''
 		Insert an element at the specified position
@@ -294,12 +306,12 @@ class PSequenceBase(Generic[T]):
 		>>> psequence([1,2,3,4]).insert(10, 0)
 		psequence([1, 2, 3, 4, 0])
 		'''
+		raise NotImplementedError
 
 	@overload
 	def delete(self, index:int) -> PSequenceBase[T]: ...
 	@overload
 	def delete(self, index:slice) -> PSequenceBase[T]: ...
-	@abstractmethod
 	def delete(self, index) -> PSequenceBase[T]:
 		r'''
 		Delete the element(s) at the specified position(s)
@@ -321,8 +333,8 @@ class PSequenceBase(Generic[T]):
 		...
 		IndexError: ...
 		'''
+		raise NotImplementedError
 
-	@abstractmethod
 	def remove(self, value:T) -> PSequenceBase[T]:
 		r'''
 		Remove an element by value
@@ -338,8 +350,8 @@ class PSequenceBase(Generic[T]):
 		...
 		ValueError: ...
 		'''
+		raise NotImplementedError
 
-	@abstractmethod
 	def __mul__(self, times:int) -> PSequenceBase[T]:
 		r'''
 		Repeat the sequence k times
@@ -351,10 +363,10 @@ class PSequenceBase(Generic[T]):
 		>>> 3 * psequence([1,2,3])
 		psequence([1, 2, 3, 1, 2, 3, 1, 2, 3])
 		'''
+		raise NotImplementedError
 
 	__rmul__ = __mul__
 
-	@abstractmethod
 	def __iter__(self) -> Iterator[T]:
 		r'''
 		Create an iterator
@@ -375,8 +387,8 @@ class PSequenceBase(Generic[T]):
 		...
 		StopIteration
 		'''
+		raise NotImplementedError
 
-	@abstractmethod
 	def __reversed__(self) -> Iterator[T]:
 		r'''
 		Create a reverse iterator
@@ -397,8 +409,8 @@ class PSequenceBase(Generic[T]):
 		...
 		StopIteration
 		'''
+		raise NotImplementedError
 
-	@abstractmethod
 	def __len__(self) -> int:
 		r'''
 		Get the length of the sequence
@@ -408,8 +420,21 @@ class PSequenceBase(Generic[T]):
 		>>> len(psequence([1,2,3,4]))
 		4
 		'''
+		raise NotImplementedError
+
+	def __contains__(self, value:object) -> bool:
+		r'''
+		Check if the sequence contains a value
+
+		:math:`O(n)`
+
+		>>> 3 in psequence([1,2,3,4])
+		True
+		>>> 5 in psequence([1,2,3,4])
+		False
+		'''
+		raise NotImplementedError
 
-	@abstractmethod
 	def __reduce__(self):
 		r'''
 		Support method for :mod:`python:pickle`
@@ -420,8 +445,8 @@ class PSequenceBase(Generic[T]):
 		>>> pickle.loads(pickle.dumps(psequence([1,2,3,4])))
 		psequence([1, 2, 3, 4])
 		'''
+		raise NotImplementedError
 
-	@abstractmethod
 	def __repr__(self) -> str:
 		r'''
 		Get a formatted string representation
@@ -431,10 +456,10 @@ class PSequenceBase(Generic[T]):
 		>>> repr(psequence([1,2,3]))
 		'psequence([1, 2, 3])'
 		'''
+		raise NotImplementedError
 
 	__str__ = __repr__
 
-	@abstractmethod
 	def appendleft(self, value:T) -> PSequenceBase[T]:
 		r'''
 		Add an element to the left end
@@ -444,8 +469,8 @@ class PSequenceBase(Generic[T]):
 		>>> psequence([1,2,3]).appendleft(0)
 		psequence([0, 1, 2, 3])
 		'''
+		raise NotImplementedError
 
-	@abstractmethod
 	def appendright(self, value:T) -> PSequenceBase[T]:
 		r'''
 		Add an element to the right end
@@ -457,10 +482,10 @@ class PSequenceBase(Generic[T]):
 		>>> psequence([1,2,3]).appendright(4)
 		psequence([1, 2, 3, 4])
 		'''
+		raise NotImplementedError
 
 	append = appendright
 
-	@abstractmethod
 	def count(self, value:T) -> int:
 		r'''
 		Count the number of times a value appears
@@ -470,8 +495,8 @@ class PSequenceBase(Generic[T]):
 		>>> psequence([1,2,3,3,4]).count(3)
 		2
 		'''
+		raise NotImplementedError
 
-	@abstractmethod
 	def index(self, value, start:int=0, stop:int=0) -> int:
 		r'''
 		Find the first index of a value
@@ -487,8 +512,8 @@ class PSequenceBase(Generic[T]):
 		...
 		ValueError: ...
 		'''
+		raise NotImplementedError
 
-	@abstractmethod
 	def splitat(self, index:int) -> Tuple[PSequenceBase[T], PSequenceBase[T]]:
 		r'''
 		Split a sequence at a given position
@@ -507,8 +532,8 @@ class PSequenceBase(Generic[T]):
 		>>> psequence([1,2,3,4]).splitat(-5)
 		(psequence([]), psequence([1, 2, 3, 4]))
 		'''
+		raise NotImplementedError
 
-	@abstractmethod
 	def chunksof(self, size:int) -> PSequenceBase[Sequence[T]]:
 		r'''
 		Split the sequence into chunks
@@ -518,9 +543,9 @@ class PSequenceBase(Generic[T]):
 		>>> psequence([1,2,3,4,5,6,7,8]).chunksof(3)
 		psequence([psequence([1, 2, 3]), psequence([4, 5, 6]), psequence([7, 8])])
 		'''
+		raise NotImplementedError
 
 	@property
-	@abstractmethod
 	def left(self) -> T:
 		r'''
 		Extract the first element
@@ -536,9 +561,9 @@ class PSequenceBase(Generic[T]):
 		...
 		IndexError: ...
 		'''
+		raise NotImplementedError
 
 	@property
-	@abstractmethod
 	def right(self) -> T:
 		r'''
 		Extract the last element
@@ -554,8 +579,8 @@ class PSequenceBase(Generic[T]):
 		...
 		IndexError: ...
 		'''
+		raise NotImplementedError
 
-	@abstractmethod
 	def viewleft(self) -> Tuple[T, PSequenceBase[T]]:
 		r'''
 		Analyse the left end
@@ -571,8 +596,8 @@ class PSequenceBase(Generic[T]):
 		...
 		IndexError: ...
 		'''
+		raise NotImplementedError
 
-	@abstractmethod
 	def viewright(self) -> Tuple[PSequenceBase[T], T]:
 		r'''
 		Analyse the right end
@@ -588,8 +613,8 @@ class PSequenceBase(Generic[T]):
 		...
 		IndexError: ...
 		'''
+		raise NotImplementedError
 
-	@abstractmethod
 	def view(self, *index:int) -> Tuple[Union[T, PSequenceBase[T]], ...]:
 		r'''
 		Split a sequence on the given position(s)
@@ -619,8 +644,8 @@ class PSequenceBase(Generic[T]):
 		...
 		IndexError: ...
 		'''
+		raise NotImplementedError
 
-	@abstractmethod
 	def reverse(self) -> PSequenceBase[T]:
 		r'''
 		Reverse the sequence
@@ -630,8 +655,8 @@ class PSequenceBase(Generic[T]):
 		>>> psequence([1,2,3,4]).reverse()
 		psequence([4, 3, 2, 1])
 		'''
+		raise NotImplementedError
 
-	@abstractmethod
 	def tolist(self) -> List[T]:
 		r'''
 		Convert the sequence to a :class:`python:list`
@@ -641,8 +666,8 @@ class PSequenceBase(Generic[T]):
 		>>> psequence([1,2,3,4]).tolist()
 		[1, 2, 3, 4]
 		'''
+		raise NotImplementedError
 
-	@abstractmethod
 	def totuple(self) -> Tuple[T, ...]:
 		r'''
 		Convert the sequence to a :class:`python:tuple`
@@ -652,8 +677,8 @@ class PSequenceBase(Generic[T]):
 		>>> psequence([1,2,3,4]).totuple()
 		(1, 2, 3, 4)
 		'''
+		raise NotImplementedError
 
-	@abstractmethod
 	def transform(self, transformations) -> PSequenceBase[T]:
 		r'''
 		Apply one or more transformations
@@ -662,16 +687,16 @@ class PSequenceBase(Generic[T]):
 		>>> psequence([1,2,3,4]).transform([ny], lambda x: x*2)
 		psequence([2, 4, 6, 8])
 		'''
+		raise NotImplementedError
 
-	@abstractmethod
 	def evolver(self) -> PSequenceEvolverBase[T]:
 		r'''
 		Create an :class:`Evolver`
 
 		:math:`O(1)`
 		'''
+		raise NotImplementedError
 
-	@abstractmethod
 	def sort(self, *args, **kwargs) -> PSequenceBase[T]:
 		r'''
 		Creat a sorted copy of the sequence
@@ -683,9 +708,9 @@ class PSequenceBase(Generic[T]):
 		>>> psequence([3,1,4,2]).sort()
 		psequence([1, 2, 3, 4])
 		'''
+		raise NotImplementedError
 
 	@staticmethod
-	@abstractmethod
 	def _fromitems(iterable:Optional[Iterable[T]]=None) -> PSequenceBase[T]:
 		r'''
 		Create a :class:`PSequence` from the given items
@@ -697,6 +722,7 @@ class PSequenceBase(Generic[T]):
 		>>> psequence([1,2,3,4])
 		psequence([1, 2, 3, 4])
 		'''
+		raise NotImplementedError
 
 class PSequenceEvolverBase(PSequenceBase[T]):
 	r'''
@@ -754,7 +780,8 @@ class PSequenceEvolverBase(PSequenceBase[T]):
 	psequence([1, 2, 0, 4]).evolver()
 	'''
 
-	@abstractmethod
+	__slots__ = ()
+
 	def popleft(self) -> T:
 		r'''
 		Remove the leftmost element
@@ -773,8 +800,8 @@ class PSequenceEvolverBase(PSequenceBase[T]):
 		...
 		IndexError: ...
 		'''
+		raise NotImplementedError
 
-	@abstractmethod
 	def popright(self) -> T:
 		r'''
 		Remove the rightmost element
@@ -793,12 +820,12 @@ class PSequenceEvolverBase(PSequenceBase[T]):
 		...
 		IndexError: ...
 		'''
+		raise NotImplementedError
 
 	@overload
 	def pop(self, index:Optional[int]=None) -> T: ...
 	@overload
 	def pop(self, index:slice) -> PSequenceBase[T]: ...
-	@abstractmethod
 	def pop(self, index=None):
 		r'''
 		Remove and return an element at the specified index
@@ -817,8 +844,8 @@ class PSequenceEvolverBase(PSequenceBase[T]):
 		>>> seq
 		psequence([1, 3]).evolver()
 		'''
+		raise NotImplementedError
 
-	@abstractmethod
 	def copy(self) -> PSequenceEvolverBase[T]:
 		r'''
 		Return a shallow copy of the sequence
@@ -833,8 +860,8 @@ class PSequenceEvolverBase(PSequenceBase[T]):
 		>>> seq1
 		psequence([1, 2, 3, 4]).evolver()
 		'''
+		raise NotImplementedError
 
-	@abstractmethod
 	def clear(self) -> PSequenceEvolverBase[T]:
 		r'''
 		Remove all items from the sequence
@@ -846,8 +873,8 @@ class PSequenceEvolverBase(PSequenceBase[T]):
 		>>> seq
 		psequence([]).evolver()
 		'''
+		raise NotImplementedError
 
-	@abstractmethod
 	def persistent(self) -> PSequenceBase[T]:
 		r'''
 		Extract the sequence from the evolver
@@ -858,6 +885,7 @@ class PSequenceEvolverBase(PSequenceBase[T]):
 		>>> seq.evolver().persistent()
 		psequence([1, 2, 3, 4])
 		'''
+		raise NotImplementedError
 
 	@staticmethod
 	def _fromitems(iterable:Optional[Iterable[T]]=None) -> PSequenceBase[T]: ...
@@ -164,6 +164,7 @@ typedef struct FSlice {
 typedef struct PSequence {
 	PyObject_HEAD
 	FTree* tree;
+	Py_hash_t hash; // -1 until first computed
 	PyObject* weakrefs;
 } PSequence;
 
@@ -238,20 +239,24 @@ static bool FTree_empty(const FTree* tree) {
 	return tree->type == FEmptyT;
 }
 
+// negative indices wrap around, and a single unsigned comparison
+// rejects both indices that are still negative and those past the end
 static bool FTree_checkIndex(const FTree* tree, Py_ssize_t* index) {
-	Py_ssize_t size = FTree_size(tree);
+	size_t size = FTree_size(tree);
 	Py_ssize_t idx = *index;
-	if(idx < 0) idx += size;
-	if(!(0 <= idx && idx < size))
+	idx += (Py_ssize_t)size & -(Py_ssize_t)(idx < 0);
+	if((size_t)idx >= size)
 		return false;
 	*index = idx;
 	return true;
 }
 
+// the indices are unsigned, so compare instead of subtracting
+// to avoid truncating the difference to an int
 static int FIndex2_compare(const FIndex2* x, const FIndex2* y) {
 	if(x->index1 == y->index1)
-		return x->index2 - y->index2;
-	return x->index1 - y->index1;
+		return (x->index2 > y->index2) - (x->index2 < y->index2);
+	return (x->index1 > y->index1) - (x->index1 < y->index1);
 }
 
 // }}}
@@ -734,6 +739,7 @@ static PSequence* PSequence_make(const FTree* tree) {
 	assert(tree != NULL);
 	PSequence* seq = PyObject_GC_New(PSequence, &PSequenceType);
 	seq->tree = (FTree*)tree;
+	seq->hash = -1;
 	seq->weakrefs = NULL;
 	PyObject_GC_Track(seq);
 	return seq;
@@ -1330,22 +1336,42 @@ static FTree* FTree_fromNodes(size_t size, size_t count, FNode** nodes) {
 	return tree;
 }
 
-static PSequence* PSequence_fromIterable(PyObject* sequence) {
+// returns a new reference to a tree holding the items of the iterable,
+// sharing the tree of a psequence or evolver instead of copying it
+static FTree* FTree_fromIterable(PyObject* sequence) {
 	assert(sequence != NULL);
 	if(Py_TYPE(sequence) == &PSequenceType)
-		return PObj_IncRef(sequence);
+		return FTree_incRef(((PSequence*)sequence)->tree);
 	if(Py_TYPE(sequence) == &PSequenceEvolverType)
-		return PObj_IncRef(((PSequenceEvolver*)sequence)->seq);
+		return FTree_incRef(((PSequenceEvolver*)sequence)->seq->tree);
 	PyObject* seq = PySequence_Fast(sequence, "expected a sequence");
 	if(seq == NULL) return NULL;
 	Py_ssize_t size = PySequence_Fast_GET_SIZE(seq);
 	FNode** nodes = PyMem_Malloc(size * sizeof(FNode*));
+	if(nodes == NULL) {
+		Py_DECREF(seq);
+		PyErr_NoMemory();
+		return NULL;
+	}
 	PyObject** iter = PySequence_Fast_ITEMS(seq);
 	for(Py_ssize_t i = 0; i < size; ++i)
 		nodes[i] = FNode_makeE(PObj_IncRef(*iter++));
 	Py_DECREF(seq);
 	FTree* tree = FTree_fromNodes(size, size, nodes);
 	PyMem_Free(nodes);
+	return tree;
+}
+
+static PSequence* PSequence_fromIterable(PyObject* sequence) {
+	assert(sequence != NULL);
+	if(Py_TYPE(sequence) == &PSequenceType)
+		return PObj_IncRef(sequence);
+	if(Py_TYPE(sequence) == &PSequenceEvolverType)
+		return PObj_IncRef(((PSequenceEvolver*)sequence)->seq);
+	FTree* tree = FTree_fromIterable(sequence);
+	if(tree == NULL) return NULL;
+	if(FTree_empty(tree))
+		return FTree_decRefRet(tree, PObj_IncRef(EMPTY_SEQUENCE));
 	return PSequence_make(tree);
 }
 
@@ -1491,7 +1517,7 @@ static void* FTree_getItem(const FTree* tree, size_t index) {
 }
 
 static PyObject* PSequence_getItem(const PSequence* self, Py_ssize_t index) {
-	if(!(0 <= index && index < FTree_ssize(self->tree)))
+	if((size_t)index >= FTree_size(self->tree))
 		return PSequence_indexError(index);
 	PyObject* value = FTree_getItem(self->tree, index);
 	assert(value != NULL);
@@ -1499,7 +1525,7 @@ static PyObject* PSequence_getItem(const PSequence* self, Py_ssize_t index) {
 }
 
 static PyObject* PSequence_getItemS(const PSequence* self, Py_ssize_t index) {
-	if(index < 0) index += FTree_ssize(self->tree);
+	index += FTree_ssize(self->tree) & -(Py_ssize_t)(index < 0);
 	return PSequence_getItem(self, index);
 }
 
@@ -1563,8 +1589,26 @@ static FTree* FDeep_extend(FDeep* xs, FDeep* ys) {
 		mid[count] = FNode_incRef(xs->right->items[count]);
 	for(int i = 0; i < ys->left->count; ++i, ++count)
 		mid[count] = FNode_incRef(ys->left->items[i]);
-	FTree* right = FTree_incRef(ys->middle);
 	assert(2 <= count && count <= 8);
+	if(FTree_empty(ys->middle) && !FTree_empty(xs->middle)) {
+		// push the nodes onto the left middle instead, so the recursion
+		// stops at the depth of the shallower tree
+		FTree* left = FTree_incRef(xs->middle);
+		for(int i = 0; i < count; ) {
+			if(count - i == 2 || count - i == 4) {
+				left = FTree_decRefRet(left, FTree_appendRight(left,
+					FNode_makeS(mid[i], mid[i+1], NULL)));
+				i += 2;
+			} else {
+				left = FTree_decRefRet(left, FTree_appendRight(left,
+					FNode_makeS(mid[i], mid[i+1], mid[i+2])));
+				i += 3;
+			}
+		}
+		return FDeep_make(size, FDigit_incRef(xs->left),
+			left, FDigit_incRef(ys->right));
+	}
+	FTree* right = FTree_incRef(ys->middle);
 	switch(count) {
 		case 8: right = FTree_decRefRet(right, FTree_appendLeft(right,
 			FNode_makeS(mid[5], mid[6], mid[7])));
@@ -1609,19 +1653,25 @@ static FTree* FTree_extend(FTree* xs, FTree* ys) {
 }
 
 static PSequence* PSequence_extendRight(PSequence* self, PyObject* arg) {
-	PSequence* other = PSequence_fromIterable(arg);
+	if(FTree_empty(self->tree))
+		return PSequence_fromIterable(arg);
+	FTree* other = FTree_fromIterable(arg);
 	if(other == NULL) return NULL;
-	PSequence* ret = PSequence_make(FTree_extend(self->tree, other->tree));
-	Py_DECREF(other);
-	return ret;
+	if(FTree_empty(other))
+		return FTree_decRefRet(other, PObj_IncRef(self));
+	return PSequence_make(FTree_decRefRet(other,
+		FTree_extend(self->tree, other)));
 }
 
 static PSequence* PSequence_extendLeft(PSequence* self, PyObject* arg) {
-	PSequence* other = PSequence_fromIterable(arg);
+	if(FTree_empty(self->tree))
+		return PSequence_fromIterable(arg);
+	FTree* other = FTree_fromIterable(arg);
 	if(other == NULL) return NULL;
-	PSequence* ret = PSequence_make(FTree_extend(other->tree, self->tree));
-	Py_DECREF(other);
-	return ret;
+	if(FTree_empty(other))
+		return FTree_decRefRet(other, PObj_IncRef(self));
+	return PSequence_make(FTree_decRefRet(other,
+		FTree_extend(other, self->tree)));
 }
 
 // }}}
@@ -1728,7 +1778,7 @@ static PSequence* PSequence_setItem(
 	Py_ssize_t index,
 	PyObject* value
 ) {
-	if(!(0 <= index && index < FTree_ssize(self->tree)))
+	if((size_t)index >= FTree_size(self->tree))
 		return PSequence_indexError(index);
 	return PSequence_make(FTree_setItem(
 		self->tree, index, PObj_IncRef(value)));
@@ -1820,7 +1870,7 @@ static PSequence* PSequence_msetItemN(PSequence* self, PyObject* args) {
 	if(argc == 0) return PObj_IncRef(self);
 	FMset mset = { .index = 0, .count = 0, .items = NULL };
 	FIndex2* items = (mset.items = PyMem_Malloc(argc * sizeof(FIndex2)));
-	items = items;
+	if(items == NULL) return (PSequence*)PyErr_NoMemory();
 	for(Py_ssize_t i = 0; i < argc; ++i)
 		items[i].value = NULL;
 	for(Py_ssize_t index = 0; index < argc; ++index) {
@@ -2327,7 +2377,7 @@ static FMeld FTree_deleteItem(FTree* tree, size_t index) {
 }
 
 static PSequence* PSequence_deleteItem(PSequence* self, Py_ssize_t index) {
-	if(!(0 <= index && index < FTree_ssize(self->tree)))
+	if((size_t)index >= FTree_size(self->tree))
 		return PSequence_indexError(index);
 	FMeld meld = FTree_deleteItem(self->tree, index);
 	assert((meld.node == NULL) == !meld.full);
@@ -2949,18 +2999,32 @@ static PyObject* PObj_compare(PyObject* x, PyObject* y, int op) {
 }
 
 static PyObject* PIter_compare(PyObject* xs, PyObject* ys, int op) {
-	PyObject* x = PyIter_Next(xs);
-	if(x == NULL && PyErr_Occurred()) return NULL;
-	PyObject* y = PyIter_Next(ys);
-	if(y == NULL && PyErr_Occurred()) {
+	for(;;) {
+		PyObject* x = PyIter_Next(xs);
+		if(x == NULL && PyErr_Occurred()) return NULL;
+		PyObject* y = PyIter_Next(ys);
+		if(y == NULL && PyErr_Occurred()) {
+			if(x != NULL) Py_DECREF(x);
+			return NULL;
+		}
+		PyObject* cmp = PObj_compare(x, y, op);
 		if(x != NULL) Py_DECREF(x);
-		return NULL;
+		if(y != NULL) Py_DECREF(y);
+		if(cmp != NULL || PyErr_Occurred()) return cmp;
 	}
-	PyObject* cmp = PObj_compare(x, y, op);
-	if(x != NULL) Py_DECREF(x);
-	if(y != NULL) Py_DECREF(y);
-	if(cmp != NULL || PyErr_Occurred()) return cmp;
-	return PIter_compare(xs, ys, op);
+}
+
+// length of an object, -1 if it has no length, -2 on error
+static Py_ssize_t PObj_size(PyObject* obj) {
+	if(Py_TYPE(obj) == &PSequenceType)
+		return FTree_ssize(((PSequence*)obj)->tree);
+	if(Py_TYPE(obj) == &PSequenceEvolverType)
+		return FTree_ssize(((PSequenceEvolver*)obj)->seq->tree);
+	Py_ssize_t size = PyObject_Size(obj);
+	if(size != -1) return size;
+	if(!PyErr_ExceptionMatches(PyExc_TypeError)) return -2;
+	PyErr_Clear();
+	return -1;
 }
 
 static PyObject* PSequence_compare(PyObject* xs, PyObject* ys, int op) {
@@ -2971,6 +3035,14 @@ static PyObject* PSequence_compare(PyObject* xs, PyObject* ys, int op) {
 			return PObj_IncRef(Py_False);
 		default: Py_UNREACHABLE();
 	}
+	if(op == Py_EQ || op == Py_NE) {
+		Py_ssize_t xsize = PObj_size(xs);
+		if(xsize == -2) return NULL;
+		Py_ssize_t ysize = PObj_size(ys);
+		if(ysize == -2) return NULL;
+		if(xsize != -1 && ysize != -1 && xsize != ysize)
+			return PObj_IncRef(op == Py_EQ ? Py_False : Py_True);
+	}
 	PyObject* xi = PyObject_GetIter(xs);
 	if(xi == NULL) return NULL;
 	PyObject* yi = PyObject_GetIter(ys);
@@ -3038,11 +3110,12 @@ static Py_uhash_t FTree_hash(FTree* tree, Py_uhash_t acc) {
 }
 
 static Py_hash_t PSequence_hash(PSequence* self) {
+	if(self->hash != -1) return self->hash;
 	Py_uhash_t acc = FTree_hash(self->tree, _PyHASH_XXPRIME_5);
 	if(acc == (Py_uhash_t)-1) return -1;
 	acc += FTree_ssize(self->tree) ^ (_PyHASH_XXPRIME_5 ^ 3527539UL);
-	if (acc == (Py_uhash_t)-1) return 1546275796;
-	return acc;
+	if (acc == (Py_uhash_t)-1) acc = 1546275796;
+	return self->hash = acc;
 }
 
 // }}}
@@ -3095,6 +3168,7 @@ static FTree* FTree_reverse(FTree* tree) {
 }
 
 static PSequence* PSequence_reverse(PSequence* self) {
+	if(FTree_size(self->tree) <= 1) return PObj_IncRef(self);
 	return PSequence_make(FTree_reverse(self->tree));
 }
 
@@ -3339,13 +3413,14 @@ static PSequence* PSequence_setSlice(
 		FTree_ssize(self->tree), &start, &stop, step);
 	if(step == 1) {
 		if(start > stop) stop = start;
-		PSequence* mid = PSequence_fromIterable(value);
+		FTree* mid = FTree_fromIterable(value);
+		if(mid == NULL) return NULL;
 		PSequence* left = PSequence_takeLeft(self, start);
 		PSequence* right = PSequence_takeRight(self,
 			FTree_ssize(self->tree) - stop);
-		FTree* tree = FTree_extend(mid->tree, right->tree);
+		FTree* tree = FTree_decRefRet(mid, FTree_extend(mid, right->tree));
 		tree = FTree_decRefRet(tree, FTree_extend(left->tree, tree));
-		Py_DECREF(mid); Py_DECREF(left); Py_DECREF(right);
+		Py_DECREF(left); Py_DECREF(right);
 		return PSequence_make(tree);
 	}
 	if(count == 0) return PObj_IncRef(self);
@@ -3470,11 +3545,18 @@ static PyObject* PSequence_refcount(PyObject* self, PyObject* args) {
 		FRefs_get(FTreeR), FRefs_get(FDigitR), FRefs_get(FNodeR));
 }
 
-static PSequence* PSequence_fromItems(PyObject* self, PyObject* args) {
-	PyObject* arg = NULL;
-	if(!PyArg_ParseTuple(args, "|O", &arg)) return NULL;
-	if(arg == NULL) return PObj_IncRef(EMPTY_SEQUENCE);
-	return PSequence_fromIterable(arg);
+static PSequence* PSequence_fromItems(
+	PyObject* self,
+	PyObject* const* args,
+	Py_ssize_t nargs
+) {
+	if(nargs > 1) {
+		PyErr_Format(PyExc_TypeError,
+			"_fromitems expected at most 1 argument, got %zd", nargs);
+		return NULL;
+	}
+	if(nargs == 0) return PObj_IncRef(EMPTY_SEQUENCE);
+	return PSequence_fromIterable(args[0]);
 }
 
 static PSequenceIter* PSequence_iter(PSequence* self);
@@ -3540,7 +3622,10 @@ static PyMethodDef PSequence_methods[] = {
 	define_method(sort,         sort,         VARARGS | METH_KEYWORDS),
 	define_method(_fromtree,    fromTuple,    O       | METH_STATIC),
 	define_method(_refcount,    refcount,     NOARGS  | METH_STATIC),
-	define_method(_fromitems,   fromItems,    VARARGS | METH_STATIC),
+	define_method(_fromitems,   fromItems,    FASTCALL | METH_STATIC),
+#if PY_VERSION_HEX >= 0x03090000
+	{ "__class_getitem__", Py_GenericAlias, METH_O | METH_CLASS, "See PEP 585" },
+#endif
 	{NULL}
 };
 #undef define_method
@@ -3924,8 +4009,57 @@ inherit_new1(repeat, Py_ssize_t)
 inherit_query1(getItem, PyObject*, Py_ssize_t)
 inherit_query1(subscr, PyObject*, PyObject*)
 
-inherit_methodN(appendRight)
-inherit_methodN(appendLeft)
+// the evolver may update its sequence in place when nothing else can
+// observe it: the psequence, its tree and the outer digit are all
+// referenced exactly once, so they are private to this evolver
+static FDigit* PSequenceEvolver_ownedDigit(PSequenceEvolver* self, bool right) {
+	PSequence* seq = self->seq;
+	if(Py_REFCNT(seq) != 1 || seq->weakrefs != NULL) return NULL;
+	FTree* tree = seq->tree;
+	if(tree->refs != 1 || tree->type != FDeepT) return NULL;
+	FDigit* digit = right ? tree->deep->right : tree->deep->left;
+	if(digit->refs != 1 || digit->count == 4) return NULL;
+	return digit;
+}
+
+static PSequenceEvolver* PSequenceEvolver_appendRight(
+	PSequenceEvolver* self,
+	PyObject* value
+) {
+	FDigit* digit = PSequenceEvolver_ownedDigit(self, true);
+	if(digit == NULL) {
+		PSequence* seq = PSequence_appendRight(self->seq, value);
+		if(seq == NULL) return NULL;
+		Py_DECREF(self->seq); self->seq = seq;
+		return PObj_IncRef(self);
+	}
+	digit->items[digit->count++] = FNode_makeE(PObj_IncRef(value));
+	++digit->size;
+	++self->seq->tree->deep->size;
+	self->seq->hash = -1;
+	return PObj_IncRef(self);
+}
+
+static PSequenceEvolver* PSequenceEvolver_appendLeft(
+	PSequenceEvolver* self,
+	PyObject* value
+) {
+	FDigit* digit = PSequenceEvolver_ownedDigit(self, false);
+	if(digit == NULL) {
+		PSequence* seq = PSequence_appendLeft(self->seq, value);
+		if(seq == NULL) return NULL;
+		Py_DECREF(self->seq); self->seq = seq;
+		return PObj_IncRef(self);
+	}
+	for(int i = digit->count++; i > 0; --i)
+		digit->items[i] = digit->items[i - 1];
+	digit->items[0] = FNode_makeE(PObj_IncRef(value));
+	++digit->size;
+	++self->seq->tree->deep->size;
+	self->seq->hash = -1;
+	return PObj_IncRef(self);
+}
+
 inherit_query1(peekRight, PyObject*, void*)
 inherit_query1(peekLeft, PyObject*, void*)
 
@@ -4122,6 +4256,9 @@ static PyMethodDef PSequenceEvolver_methods[] = {
 	define_method(copy,         copy,         NOARGS),
 	define_method(clear,        clear,        NOARGS),
 	define_method(sort,         sort,         VARARGS | METH_KEYWORDS),
+#if PY_VERSION_HEX >= 0x03090000
+	{ "__class_getitem__", Py_GenericAlias, METH_O | METH_CLASS, "See PEP 585" },
+#endif
 	{NULL}
 };
 #undef define_method
@@ -4240,9 +4377,11 @@ bool pyrsistent_psequence_inheritDocs() {
 		PSequenceType.tp_doc = PObj_getDoc("PSequenceBase", module);
 	if(PSequenceType.tp_doc == NULL) goto err1;
 
+	// psequence is bound directly to _fromitems, so it needs a docstring too
 	for(struct PyMethodDef* methdef = PSequenceType.tp_methods;
 			methdef->ml_name != NULL; ++methdef) {
-		if(methdef->ml_doc != NULL || methdef->ml_name[0] == '_') continue;
+		if(methdef->ml_doc != NULL || (methdef->ml_name[0] == '_'
+			&& strcmp(methdef->ml_name, "_fromitems") != 0)) continue;
 		methdef->ml_doc = PObj_getDoc(methdef->ml_name, seqbase);
 		if(methdef->ml_doc == NULL) goto err2;
 	}
@@ -4292,6 +4431,7 @@ PyMODINIT_FUNC PyInit__c_ext() {
 		EMPTY_SEQUENCE = PyObject_GC_New(PSequence, &PSequenceType);
 		if(EMPTY_SEQUENCE == NULL) return NULL;
 		EMPTY_SEQUENCE->tree = FEmpty_make();
+		EMPTY_SEQUENCE->hash = -1;
 		EMPTY_SEQUENCE->weakrefs = NULL;
 		PyObject_GC_Track((PyObject*)EMPTY_SEQUENCE);
 	}
@@ -1,7 +1,7 @@
 from __future__ import annotations
 from typing import Sequence, MutableSequence, Hashable, \
 	Any, Iterator, Iterable, TypeVar, Union, \
-	List, Tuple, Optional, overload, cast
+	Dict, List, Tuple, Optional, overload, cast
 
 import enum
 import itertools
@@ -26,12 +26,15 @@ class PSequence(PSequenceBase[T]):
 
 	__doc__ = PSequenceBase.__doc__
 
-	__slots__ = ('_type', '_size', '_items')
+	# _hash is left unset until the first __hash__ call, so building
+	# nodes does not pay for initialising it
+	__slots__ = ('_type', '_size', '_items', '_hash')
 
 	if not sphinx_build:
 		_type: PSequence._Type
 		_size: int
 		_items: Tuple[PSequence[T], ...]
+		_hash: int
 
 	class _Type(enum.Enum):
 		Node = 0
@@ -47,36 +50,36 @@ class PSequence(PSequenceBase[T]):
 
 	@staticmethod
 	def _node1(value):
-		return PSequence(PSequence._Type.Node, 1, (value,))
+		return _make(NODE, 1, (value,))
 	@staticmethod
 	def _node(size, *items):
-		return PSequence(PSequence._Type.Node, size, items)
+		return _make(NODE, size, items)
 	@staticmethod
 	def _nodeS(*items):
 		size = sum(i._size for i in items)
-		return PSequence(PSequence._Type.Node, size, items)
+		return _make(NODE, size, items)
 
 	@staticmethod
 	def _digit(size, *items):
-		return PSequence(PSequence._Type.Digit, size, items)
+		return _make(DIGIT, size, items)
 	@staticmethod
 	def _digitS(*items):
 		size = sum(i._size for i in items)
-		return PSequence(PSequence._Type.Digit, size, items)
+		return _make(DIGIT, size, items)
 
 	@staticmethod
 	def _single(item):
-		return PSequence(PSequence._Type.Tree, item._size, (item,))
+		return _make(TREE, item._size, (item,))
 	@staticmethod
 	def _deep(size, left, middle, right):
-		return PSequence(PSequence._Type.Tree, size, (left, middle, right))
+		return _make(TREE, size, (left, middle, right))
 	@staticmethod
 	def _deepS(left, middle, right):
 		size = left._size + middle._size + right._size
-		return PSequence(PSequence._Type.Tree, size, (left, middle, right))
+		return _make(TREE, size, (left, middle, right))
 
 	def _isnode1(self):
-		return self._size == 1 and self._type == PSequence._Type.Node
+		return self._size == 1 and self._type is NODE
 
 	def _appendright(self, item):
 		if self._size == 0:
@@ -91,10 +94,12 @@ class PSequence(PSequenceBase[T]):
 			return PSequence._deep(self._size + item._size,
 				left, middle,
 				PSequence._digit(right._size + item._size, *right._items, item))
+		last = right._items[3]
 		return PSequence._deep(self._size + item._size,
 			left,
-			middle._appendright(PSequence._nodeS(*right._items[:3])),
-			PSequence._digitS(right._items[3], item))
+			middle._appendright(
+				_make(NODE, right._size - last._size, right._items[:3])),
+			_make(DIGIT, last._size + item._size, (last, item)))
 
 	def appendright(self, value:T) -> PSequence[T]:
 		return self._appendright(PSequence._node1(value))
@@ -114,9 +119,11 @@ class PSequence(PSequenceBase[T]):
 			return PSequence._deep(self._size + item._size,
 				PSequence._digit(left._size + item._size, item, *left._items),
 				middle, right)
+		head = left._items[0]
 		return PSequence._deep(self._size + item._size,
-			PSequence._digitS(item, left._items[0]),
-			middle._appendleft(PSequence._nodeS(*left._items[1:])),
+			_make(DIGIT, item._size + head._size, (item, head)),
+			middle._appendleft(
+				_make(NODE, left._size - head._size, left._items[1:])),
 			right)
 
 	def appendleft(self, value:T) -> PSequence[T]:
@@ -143,16 +150,16 @@ class PSequence(PSequenceBase[T]):
 			return PSequence._fromnodes(left._size, left._items)
 		init, last = self._viewright()
 		return PSequence._deep(self._size + left._size,
-			left, init, PSequence._digit(last._size, *last._items))
+			left, init, _make(DIGIT, last._size, last._items))
 
 	def _viewright(self):
 		if len(self._items) == 1:
 			return EMPTY_SEQUENCE, self._items[0]
 		left, middle, right = self._items
-		*init, last = right._items
-		if not init: return middle._pullright(left), last
+		last = right._items[-1]
+		if len(right._items) == 1: return middle._pullright(left), last
 		init = PSequence._deep(self._size - last._size, left, middle,
-			PSequence._digit(right._size - last._size, *init))
+			_make(DIGIT, right._size - last._size, right._items[:-1]))
 		return init, last
 
 	def viewright(self) -> Tuple[PSequence[T], T]:
@@ -166,16 +173,16 @@ class PSequence(PSequenceBase[T]):
 			return PSequence._fromnodes(right._size, right._items)
 		head, tail = self._viewleft()
 		return PSequence._deep(self._size + right._size,
-			PSequence._digit(head._size, *head._items), tail, right)
+			_make(DIGIT, head._size, head._items), tail, right)
 
 	def _viewleft(self):
 		if len(self._items) == 1:
 			return self._items[0], EMPTY_SEQUENCE
 		left, middle, right = self._items
-		head, *tail = left._items
-		if not tail: return head, middle._pullleft(right)
+		head = left._items[0]
+		if len(left._items) == 1: return head, middle._pullleft(right)
 		return head, PSequence._deep(self._size - head._size,
-			PSequence._digit(left._size - head._size, *tail),
+			_make(DIGIT, left._size - head._size, left._items[1:]),
 			middle, right)
 
 	def viewleft(self) -> Tuple[T, PSequence[T]]:
@@ -188,7 +195,7 @@ class PSequence(PSequenceBase[T]):
 		items: List[Union[T, PSequence[T]]] = []
 		last, rest = 0, self
 		for idx in index:
-			idx = self._checkindex(idx)
+			idx = check_index(self._size, idx)
 			if idx < last: raise IndexError('indices must be in sorted order')
 			left, item, rest = rest._splitview(idx - last)
 			items.append(left)
@@ -197,48 +204,57 @@ class PSequence(PSequenceBase[T]):
 		items.append(rest)
 		return tuple(items)
 
-	def _checkindex(self, index):
-		idx = index
-		if index < 0: idx += self._size
-		if not (0 <= idx < self._size):
-			raise IndexError('index out of range: {}'.format(index))
-		return idx
+	def _findindex(self, index):
+		# returns the child containing index and the index within it
+		mid = 0
+		for item in self._items:
+			size = item._size
+			if index < size: break
+			index -= size
+			mid += 1
+		return mid, item, index
 
 	def _splitindex(self, index):
-		size = 0
-		for mid, item in enumerate(self._items):
-			size += item._size
-			if size > index: break
-		return (mid, item, size - item._size, self._items[:mid],
-			self._size - size, self._items[mid+1:])
+		mid, item, local = self._findindex(index)
+		sizeL = index - local
+		return (mid, item, sizeL, self._items[:mid],
+			self._size - sizeL - item._size, self._items[mid+1:])
 
 	def _splitview(self, index):
-		if len(self._items) == 1:
-			return EMPTY_SEQUENCE, \
-				self._items[0], \
-				EMPTY_SEQUENCE
-		left, middle, right = self._items
-		if index < left._size:
+		# descend the spine while the index falls in the middle tree,
+		# then rebuild both sides on the way back up
+		path = []
+		tree = self
+		while len(tree._items) == 3:
+			left, middle, right = tree._items
+			if index < left._size or index >= left._size + middle._size: break
+			index -= left._size
+			path.append((left, right, index))
+			tree = middle
+		if len(tree._items) == 1:
+			left1, item, right1 = EMPTY_SEQUENCE, tree._items[0], EMPTY_SEQUENCE
+		elif index < left._size:
 			mid, item, sizeL, itemsL, sizeR, itemsR = left._splitindex(index)
 			left1 = PSequence._fromnodes(sizeL, itemsL)
 			right1 = middle._pullleft(right) if not itemsR else \
-				PSequence._deepS(PSequence._digitS(*itemsR), middle, right)
-			return left1, item, right1
-		index -= left._size
-		if index < middle._size:
-			left1, midT, right1 = middle._splitview(index)
-			index -= left1._size
-			mid, item, sizeL, itemsL, sizeR, itemsR = midT._splitindex(index)
-			left2 = left1._pullright(left) if not itemsL else \
-				PSequence._deepS(left, left1, PSequence._digit(sizeL, *itemsL))
-			right2 = right1._pullleft(right) if not itemsR else \
-				PSequence._deepS(PSequence._digit(sizeR, *itemsR), right1, right)
-			return left2, item, right2
-		index -=  middle._size
-		mid, item, sizeL, itemsL, sizeR, itemsR = right._splitindex(index)
-		left1 = middle._pullright(left) if not itemsL else \
-			PSequence._deepS(left, middle, PSequence._digitS(*itemsL))
-		right1 = PSequence._fromnodes(sizeR, itemsR)
+				PSequence._deep(sizeR + middle._size + right._size,
+					_make(DIGIT, sizeR, itemsR), middle, right)
+		else:
+			index -= left._size + middle._size
+			mid, item, sizeL, itemsL, sizeR, itemsR = right._splitindex(index)
+			left1 = middle._pullright(left) if not itemsL else \
+				PSequence._deep(left._size + middle._size + sizeL,
+					left, middle, _make(DIGIT, sizeL, itemsL))
+			right1 = PSequence._fromnodes(sizeR, itemsR)
+		for left, right, index in reversed(path):
+			mid, item, sizeL, itemsL, sizeR, itemsR = \
+				item._splitindex(index - left1._size)
+			left1 = left1._pullright(left) if not itemsL else \
+				PSequence._deep(left._size + left1._size + sizeL,
+					left, left1, _make(DIGIT, sizeL, itemsL))
+			right1 = right1._pullleft(right) if not itemsR else \
+				PSequence._deep(sizeR + right1._size + right._size,
+					_make(DIGIT, sizeR, itemsR), right1, right)
 		return left1, item, right1
 
 	def splitat(self, index:int) -> Tuple[PSequence[T], PSequence[T]]:
@@ -246,31 +262,47 @@ class PSequence(PSequenceBase[T]):
 		except IndexError:
 			if index < 0: return EMPTY_SEQUENCE, self
 			return self, EMPTY_SEQUENCE
+		# splits next to either end only need to peel off the outer digit
+		if index == 0: return EMPTY_SEQUENCE, self
+		if index == self._size - 1:
+			init, last = self._viewright()
+			return init, PSequence._single(last)
 		left, mid, right = self._splitview(index)
 		return left, right._appendleft(mid)
 
 	@staticmethod
 	def _fromnodes(size, nodes):
-		if len(nodes) == 0: return EMPTY_SEQUENCE
-		if len(nodes) == 1: return PSequence._single(nodes[0])
-		if len(nodes) <= 8:
-			mid = len(nodes) // 2
-			return PSequence._deep(size,
-				PSequence._digitS(*nodes[:mid]),
-				EMPTY_SEQUENCE,
-				PSequence._digitS(*nodes[mid:]))
-		left = PSequence._digitS(*nodes[:3])
-		right = PSequence._digitS(*nodes[-3:])
-		if len(nodes) % 3 == 0:
-			most, rest = nodes[3:-3], []
-		elif len(nodes) % 3 == 1:
-			most, rest = nodes[3:-7], [nodes[-7:-5], nodes[-5:-3]]
+		# build the spine level by level instead of recursing, packing
+		# the nodes between the outer digits into 3-nodes (and 2-nodes
+		# at the end) to form the nodes of the next level down
+		spine = []
+		while len(nodes) > 8:
+			count = len(nodes)
+			a, b, c = nodes[0], nodes[1], nodes[2]
+			left = _make(DIGIT, a._size + b._size + c._size, (a, b, c))
+			a, b, c = nodes[-3], nodes[-2], nodes[-1]
+			right = _make(DIGIT, a._size + b._size + c._size, (a, b, c))
+			spine.append((size, left, right))
+			size -= left._size + right._size
+			stop = count - 3 - (0, 4, 2)[count % 3]
+			merged = []
+			for i in range(3, stop, 3):
+				a, b, c = nodes[i], nodes[i+1], nodes[i+2]
+				merged.append(_make(NODE, a._size + b._size + c._size, (a, b, c)))
+			for i in range(stop, count - 3, 2):
+				a, b = nodes[i], nodes[i+1]
+				merged.append(_make(NODE, a._size + b._size, (a, b)))
+			nodes = merged
+		if len(nodes) == 0: tree = EMPTY_SEQUENCE
+		elif len(nodes) == 1: tree = PSequence._single(nodes[0])
 		else:
-			most, rest = nodes[3:-5], [nodes[-5:-3]]
-		most = list(zip(*([iter(most)]*3)))
-		merged = [PSequence._nodeS(*ns) for ns in most + rest]
-		middle = PSequence._fromnodes(size - left._size - right._size, merged)
-		return PSequence._deep(size, left, middle, right)
+			mid = len(nodes) // 2
+			left = PSequence._digitS(*nodes[:mid])
+			tree = PSequence._deep(size, left, EMPTY_SEQUENCE,
+				_make(DIGIT, size - left._size, tuple(nodes[mid:])))
+		for size, left, right in reversed(spine):
+			tree = _make(TREE, size, (left, tree, right))
+		return tree
 
 	def _takeleft(self, index):
 		if len(self._items) == 1:
@@ -284,13 +316,13 @@ class PSequence(PSequenceBase[T]):
 			node, left1 = middle._takeleft(index)
 			mid, item, sizeL, itemsL, sizeR, itemsR = node._splitindex(index - left1._size)
 			if not itemsL: return item, left1._pullright(left)
-			return item, PSequence._deepS(left, left1,
-				PSequence._digit(sizeL, *itemsL))
+			return item, PSequence._deep(left._size + left1._size + sizeL,
+				left, left1, _make(DIGIT, sizeL, itemsL))
 		index -= middle._size
 		mid, item, sizeL, itemsL, sizeR, itemsR = right._splitindex(index)
 		if not itemsL: return item, middle._pullright(left)
-		return item, PSequence._deepS(left, middle,
-			PSequence._digit(sizeL, *itemsL))
+		return item, PSequence._deep(left._size + middle._size + sizeL,
+			left, middle, _make(DIGIT, sizeL, itemsL))
 
 	def _takeL(self, count):
 		if count <= 0: return EMPTY_SEQUENCE
@@ -311,15 +343,14 @@ class PSequence(PSequenceBase[T]):
 			mid, item, sizeL, itemsL, sizeR, itemsR = \
 				node._splitindex(node._size - index + right1._size - 1)
 			if not itemsR: return item, right1._pullleft(right)
-			return item, PSequence._deepS(
-				PSequence._digit(sizeR, *itemsR),
-				right1, right)
+			return item, PSequence._deep(sizeR + right1._size + right._size,
+				_make(DIGIT, sizeR, itemsR), right1, right)
 		index -= middle._size
 		mid, item, sizeL, itemsL, sizeR, itemsR = \
 			left._splitindex(left._size - index - 1)
 		if not itemsR: return item, middle._pullleft(right)
-		return item, PSequence._deepS(
-			PSequence._digit(sizeR, *itemsR), middle, right)
+		return item, PSequence._deep(sizeR + middle._size + right._size,
+			_make(DIGIT, sizeR, itemsR), middle, right)
 
 	def _takeR(self, count):
 		if count <= 0: return EMPTY_SEQUENCE
@@ -334,17 +365,27 @@ class PSequence(PSequenceBase[T]):
 		left1, middle1, right1 = self._items
 		left2, middle2, right2 = other._items
 		nodes = right1._items + left2._items
-		if len(nodes) % 3 == 0:
-			most, rest = nodes, []
-		elif len(nodes) % 3 == 1:
-			most, rest = nodes[:-4], [nodes[-4:-2], nodes[-2:]]
+		count = len(nodes)
+		stop = count - (0, 4, 2)[count % 3]
+		merged = []
+		for i in range(0, stop, 3):
+			a, b, c = nodes[i], nodes[i+1], nodes[i+2]
+			merged.append(_make(NODE, a._size + b._size + c._size, (a, b, c)))
+		for i in range(stop, count, 2):
+			a, b = nodes[i], nodes[i+1]
+			merged.append(_make(NODE, a._size + b._size, (a, b)))
+		# once either middle is empty the merged nodes can be pushed
+		# onto the other one directly, which ends the recursion at the
+		# depth of the shallower tree rather than the deeper one
+		if middle1._size == 0:
+			for node in reversed(merged):
+				middle2 = middle2._appendleft(node)
+			middle = middle2
 		else:
-			most, rest = nodes[:-2], [nodes[-2:]]
-		most = list(zip(*([iter(most)]*3)))
-		for ns in most + rest:
-			middle1 = middle1._appendright(PSequence._nodeS(*ns))
-		return PSequence._deep(self._size + other._size,
-			left1, middle1._extend(middle2), right2)
+			for node in merged:
+				middle1 = middle1._appendright(node)
+			middle = middle1._extend(middle2)
+		return PSequence._deep(self._size + other._size, left1, middle, right2)
 
 	def extendright(self, other:Union[PSequence[T], Iterable[T]]) -> PSequence[T]:
 		return self._extend(PSequence._fromitems(other))
@@ -358,9 +399,10 @@ class PSequence(PSequenceBase[T]):
 	__radd__ = extendleft #: :meta public:
 
 	def reverse(self) -> PSequence[T]:
-		if self._isnode1(): return self
-		return PSequence(self._type, self._size,
-			tuple(i.reverse() for i in reversed(self._items)))
+		# anything holding at most one value is its own reverse
+		if self._size <= 1: return self
+		return _make(self._type, self._size,
+			tuple([i.reverse() for i in self._items[::-1]]))
 
 	@staticmethod
 	def _sliceindices(slice, length):
@@ -381,15 +423,18 @@ class PSequence(PSequenceBase[T]):
 		return start, stop, step, count
 
 	def _getitem(self, index):
-		if len(self._items) == 1 and self._type == PSequence._Type.Node:
-			return self._items[0]
-		mid, item, sizeL, itemsL, sizeR, itemsR = self._splitindex(index)
-		return item._getitem(index - sizeL)
+		node = self
+		while node._type is not NODE or node._size != 1:
+			for node in node._items:
+				size = node._size
+				if index < size: break
+				index -= size
+		return node._items[0]
 
 	def _getslice(self, modulo, count, step, output):
 		if count == 0: return modulo, count
 		if self._size <= modulo: return modulo - self._size, count
-		if len(self._items) == 1 and self._type == PSequence._Type.Node:
+		if len(self._items) == 1 and self._type is NODE:
 			output.append(self._items[0])
 			return step, count - 1
 		for item in self._items:
@@ -405,6 +450,12 @@ class PSequence(PSequenceBase[T]):
 			start, stop, step, count = PSequence._sliceindices(index, self._size)
 			if count <= 0: return EMPTY_SEQUENCE
 			if step < 0: start, stop = start + (count - 1) * step, start + 1
+			if abs(step) == 1 and count <= 16:
+				# a single descent gathering a few items beats cutting
+				# them out with two takes that each rebuild the spine
+				output = list(itertools.islice(self._iterfrom(start), count))
+				if step < 0: output.reverse()
+				return PSequence._fromitems(output)
 			if abs(step) == 1:
 				tree = self
 				if stop < self._size: tree = tree._takeL(stop)
@@ -412,30 +463,45 @@ class PSequence(PSequenceBase[T]):
 			else:
 				output = []
 				modulo, count = self._getslice(start, count, abs(step) - 1, output)
-				tree = PSequence._fromitems(output)
+				if step < 0: output.reverse()
+				return PSequence._fromitems(output)
 			return tree if step > 0 else tree.reverse()
-		index = check_index(self._size, index)
-		return self._getitem(index)
+		# same as check_index, inlined on the hot path
+		size = self._size
+		if 0 <= index < size: return self._getitem(index)
+		if -size <= index < 0: return self._getitem(index + size)
+		raise IndexError('index out of range: ' + str(index))
 
 	def _setitem(self, index, value):
-		if self._isnode1(): return PSequence._node1(value)
-		items = list(self._items)
-		for n, item in enumerate(items):
-			if index < item._size: break
-			index -= item._size
-		items[n] = item._setitem(index, value)
-		return PSequence(self._type, self._size, tuple(items))
+		# record the path down to the leaf, then copy it bottom-up;
+		# patching a list copy is cheaper than concatenating slices
+		path = []
+		node = self
+		while node._type is not NODE or node._size != 1:
+			parent, mid = node, 0
+			for node in parent._items:
+				size = node._size
+				if index < size: break
+				index -= size
+				mid += 1
+			path.append((parent, mid))
+		node = PSequence._node1(value)
+		for parent, mid in reversed(path):
+			items = list(parent._items)
+			items[mid] = node
+			node = _make(parent._type, parent._size, tuple(items))
+		return node
 
 	def _setslice(self, modulo, count, step, values):
 		if count == 0: return self, modulo, count
 		if self._size <= modulo: return self, modulo - self._size, count
-		if len(self._items) == 1 and self._type == PSequence._Type.Node:
+		if len(self._items) == 1 and self._type is NODE:
 			return PSequence._node1(next(values)), step, count - 1
 		items = []
 		for item in self._items:
 			item, modulo, count = item._setslice(modulo, count, step, values)
 			items.append(item)
-		return PSequence(self._type, self._size, tuple(items)), modulo, count
+		return _make(self._type, self._size, tuple(items)), modulo, count
 
 	@overload
 	def set(self, index:int, value:T) -> PSequence[T]: ...
@@ -472,10 +538,11 @@ class PSequence(PSequenceBase[T]):
 		for item in self._items:
 			index, item = item._mset(index, pairs)
 			items.append(item)
-		return index, PSequence(self._type, self._size, tuple(items))
+		return index, _make(self._type, self._size, tuple(items))
 
 	def mset(self, *items:Union[int,T,Tuple[int,T]]) -> PSequence[T]:
-		pairs: List[Tuple[int,T]] = []
+		# later updates to the same index overwrite earlier ones
+		updates: Dict[int,T] = {}
 		args = iter(items)
 		for arg in args:
 			if isinstance(arg, tuple):
@@ -484,46 +551,51 @@ class PSequence(PSequenceBase[T]):
 				index, value = arg, next(args)
 			else:
 				raise TypeError('expected int or tuple but got {}'.format(type(arg)))
-			pairs.append((check_index(self._size, index), value))
-		key = lambda x: x[0]
-		pairs = [(index, list(group)[-1][1]) for index, group in
-			itertools.groupby(sorted(pairs, key=key, reverse=True), key=key)]
+			updates[check_index(self._size, index)] = value
+		# indices are unique, so sorting never compares the values
+		pairs = sorted(updates.items(), reverse=True)
 		return self._mset(0, pairs)[1]
 
 	def _mergeleftnode(self, item):
 		if item is None: return (self,)
 		if len(self._items) == 2:
 			return (PSequence._node(self._size + item._size, item, *self._items),)
-		return (PSequence._nodeS(item, self._items[0]),
-			PSequence._nodeS(self._items[1], self._items[2]))
+		a, b, c = self._items
+		return (_make(NODE, item._size + a._size, (item, a)),
+			_make(NODE, b._size + c._size, (b, c)))
 
 	def _mergerightnode(self, item):
 		if item is None: return (self,)
 		if len(self._items) == 2:
 			return (PSequence._node(self._size + item._size, *self._items, item),)
-		return (PSequence._nodeS(self._items[0], self._items[1]),
-			PSequence._nodeS(self._items[2], item))
+		a, b, c = self._items
+		return (_make(NODE, a._size + b._size, (a, b)),
+			_make(NODE, c._size + item._size, (c, item)))
 
 	def _deleteitem(self, index):
 		if self._isnode1(): return False, None
-		mid, item, sizeL, itemsL, sizeR, itemsR = self._splitindex(index)
-		full, meld = item._deleteitem(index - sizeL)
+		mid, item, local = self._findindex(index)
+		full, meld = item._deleteitem(local)
 		msize = 0 if meld is None else meld._size
 		size = self._size - item._size + msize
-		if full: return True, PSequence(self._type, size, itemsL + (meld,) + itemsR)
+		if full:
+			items = list(self._items)
+			items[mid] = meld
+			return True, _make(self._type, size, tuple(items))
 		if len(self._items) == 1: return False, meld
-		if self._type != PSequence._Type.Tree:
+		if self._type is not TREE:
+			itemsL, itemsR = self._items[:mid], self._items[mid+1:]
 			if meld is None:
-				if self._type == PSequence._Type.Node and len(self._items) == 2:
+				if self._type is NODE and len(self._items) == 2:
 					return (False,) + itemsL + itemsR
-				if self._type == PSequence._Type.Digit and len(self._items) == 1:
+				if self._type is DIGIT and len(self._items) == 1:
 					return False, None
 			if itemsR: itemsR = itemsR[0]._mergeleftnode(meld) + itemsR[1:]
 			else: itemsL = itemsL[:-1] + itemsL[-1]._mergerightnode(meld)
 			items = itemsL + itemsR
-			if self._type == PSequence._Type.Node and len(items) == 1:
+			if self._type is NODE and len(items) == 1:
 				return (False,) + items
-			return True, PSequence(self._type, size, itemsL + itemsR)
+			return True, _make(self._type, size, itemsL + itemsR)
 		left, middle, right = self._items
 		if mid == 0:
 			if middle._size == 0:
@@ -577,18 +649,22 @@ class PSequence(PSequenceBase[T]):
 
 	def _insert(self, index, value):
 		if self._isnode1(): return value, self
-		mid, item, sizeL, itemsL, sizeR, itemsR = self._splitindex(index)
-		meld, extra = item._insert(index - sizeL, value)
+		mid, item, local = self._findindex(index)
+		meld, extra = item._insert(local, value)
 		size = self._size + value._size
-		if extra is None: return PSequence(self._type,
-			size, itemsL + (meld,) + itemsR), None
-		if self._type != PSequence._Type.Tree:
-			items = itemsL + (meld, extra) + itemsR
-			if self._type == PSequence._Type.Node and len(self._items) == 3:
+		if extra is None:
+			items = list(self._items)
+			items[mid] = meld
+			return _make(self._type, size, tuple(items)), None
+		if self._type is not TREE:
+			items = list(self._items)
+			items[mid:mid+1] = meld, extra
+			items = tuple(items)
+			if self._type is NODE and len(self._items) == 3:
 				return PSequence._nodeS(*items[:2]), PSequence._nodeS(*items[2:])
-			if self._type == PSequence._Type.Digit and len(self._items) == 4:
+			if self._type is DIGIT and len(self._items) == 4:
 				return items, items[-1]
-			return PSequence(self._type, size, items), None
+			return _make(self._type, size, items), None
 		if len(self._items) == 1:
 			return PSequence._deep(size,
 				PSequence._digitS(meld),
@@ -619,16 +695,12 @@ class PSequence(PSequenceBase[T]):
 
 	def index(self, value, start:int=0, stop:int=cast(int,None)) -> int:
 		if stop is None: stop = self._size
-		for n, x in enumerate(self[start:stop]):
-			if value == x: return n + start
-		raise ValueError('value not in sequence');
+		try: return self.tolist().index(value, start, stop)
+		except ValueError: pass
+		raise ValueError('value not in sequence')
 
 	def count(self, value:T) -> int:
-		count = 0
-		for x in self:
-			if value == x:
-				count += 1
-		return count
+		return self.tolist().count(value)
 
 	def chunksof(self, size:int) -> PSequence[Sequence[T]]:
 		acc = []
@@ -643,6 +715,7 @@ class PSequence(PSequenceBase[T]):
 	def __hash__(self) -> int:
 		r'''
 		Calculate the hash of the sequence.
+		The result is cached after the first call.
 
 		:math:`O(n)`
 
@@ -651,18 +724,29 @@ class PSequence(PSequenceBase[T]):
 		>>> hash(x1) == hash(x2)
 		True
 		'''
-		return hash(self.totuple())
-
-	def _tolist(self, acc):
-		if self._isnode1():
-			acc.append(self._items[0])
-		else:
-			for item in self._items:
-				item._tolist(acc)
-		return acc
+		try: return self._hash
+		except AttributeError: pass
+		self._hash = hash(self.totuple())
+		return self._hash
 
 	def tolist(self) -> List[T]:
-		return self._tolist([])
+		if self._isnode1(): return [self._items[0]]
+		acc: List[Any] = [None] * self._size
+		index = 0
+		# walk the tree with a stack of child iterators instead of
+		# recursing, descending into a child interrupts its parent's loop
+		stack = [iter(self._items)]
+		while stack:
+			for item in stack[-1]:
+				if item._type is NODE and item._size == 1:
+					acc[index] = item._items[0]
+					index += 1
+				else:
+					stack.append(iter(item._items))
+					break
+			else:
+				stack.pop()
+		return acc
 
 	def totuple(self) -> Tuple[T, ...]:
 		return tuple(self.tolist())
@@ -670,23 +754,38 @@ class PSequence(PSequenceBase[T]):
 	def __mul__(self, times:int) -> PSequence[T]:
 		if times <= 0: return EMPTY_SEQUENCE
 		acc, exp = EMPTY_SEQUENCE, self
-		while times != 0:
-			if times % 2 == 1:
-				acc += exp
-			exp = exp + exp
-			times //= 2
-		return acc
+		while True:
+			if times & 1: acc = acc._extend(exp)
+			times >>= 1
+			if times == 0: return acc
+			exp = exp._extend(exp)
 
 	__rmul__ = __mul__
 
 	def __len__(self) -> int:
 		return self._size
 
+	def __contains__(self, value:object) -> bool:
+		return value in self.tolist()
+
+	def _equals(self, other):
+		if self is other: return True
+		if self._size != other._size: return False
+		# hashes are only compared when both have already been computed
+		try:
+			if self._hash != other._hash: return False
+		except AttributeError: pass
+		return self.tolist() == other.tolist()
+
 	def __eq__(self, other) -> bool:
+		if isinstance(other, Evolver): other = other._seq
+		if isinstance(other, PSequence): return self._equals(other)
 		result = compare_iter(self, other, True)
 		if result is NotImplemented: return NotImplemented
 		return result == 0
 	def __ne__(self, other) -> bool:
+		if isinstance(other, Evolver): other = other._seq
+		if isinstance(other, PSequence): return not self._equals(other)
 		result = compare_iter(self, other, True)
 		if result is NotImplemented: return NotImplemented
 		return result != 0
@@ -726,9 +825,9 @@ class PSequence(PSequenceBase[T]):
 	def _fromtree(tuples):
 		ptype, size, *items = tuples
 		ptype = PSequence._Type[ptype]
-		if ptype == PSequence._Type.Node and size == 1:
+		if ptype is NODE and size == 1:
 			return PSequence._node1(items[0])
-		return PSequence(ptype, size,
+		return _make(ptype, size,
 			tuple(PSequence._fromtree(i) for i in items))
 
 	@staticmethod
@@ -742,34 +841,96 @@ class PSequence(PSequenceBase[T]):
 		if self._isnode1():
 			yield cast(T, self._items[0])
 			return
-		for item in self._items:
-			yield from item
+		# same stack walk as tolist
+		stack = [iter(self._items)]
+		while stack:
+			for item in stack[-1]:
+				if item._type is NODE and item._size == 1:
+					yield item._items[0]
+				else:
+					stack.append(iter(item._items))
+					break
+			else:
+				stack.pop()
+
+	def _iterfrom(self, index):
+		# same stack walk as __iter__, but descend straight to index first
+		stack = []
+		node = self
+		while node._type is not NODE or node._size != 1:
+			items = iter(node._items)
+			for node in items:
+				size = node._size
+				if index < size: break
+				index -= size
+			stack.append(items)
+		yield node._items[0]
+		while stack:
+			for item in stack[-1]:
+				if item._type is NODE and item._size == 1:
+					yield item._items[0]
+				else:
+					stack.append(iter(item._items))
+					break
+			else:
+				stack.pop()
 
 	def __reversed__(self) -> Iterator[T]:
 		if self._isnode1():
 			yield cast(T, self._items[0])
 			return
-		for item in reversed(self._items):
-			yield from reversed(item)
+		stack = [reversed(self._items)]
+		while stack:
+			for item in stack[-1]:
+				if item._type is NODE and item._size == 1:
+					yield item._items[0]
+				else:
+					stack.append(reversed(item._items))
+					break
+			else:
+				stack.pop()
 
 	@staticmethod
 	def _fromitems(iterable:Optional[Iterable[T]]=None) -> PSequence[T]:
 		if iterable is None: return EMPTY_SEQUENCE
 		if isinstance(iterable, Evolver): return iterable._seq
 		if isinstance(iterable, PSequence): return iterable
-		nodes = [PSequence._node1(i) for i in iterable]
+		nodes = list(map(PSequence._node1, iterable))
 		return PSequence._fromnodes(len(nodes), nodes)
 
+	_fromitems.__func__.__doc__ = PSequenceBase._fromitems.__doc__
+
 class Evolver(PSequenceEvolverBase[T]):
 	__doc__ = PSequenceEvolverBase.__doc__
 
-	__slots__ = ('_seq',)
+	__slots__ = ('_base', '_tail')
 
 	if not sphinx_build:
-		_seq: PSequence[T]
+		_base: PSequence[T]
+		_tail: List[T]
+
+	# values appended on the right are buffered in _tail and only
+	# spliced onto _base in bulk once the buffer fills up or the
+	# sequence is read, everything else goes through _seq which flushes
+	_TAIL_SIZE = 64
 
 	def __init__(self, _seq):
-		self._seq = _seq
+		self._base = _seq
+		self._tail = []
+
+	@property
+	def _seq(self) -> PSequence[T]:
+		if self._tail: self._flush()
+		return self._base
+
+	@_seq.setter
+	def _seq(self, value:PSequence[T]):
+		self._base = value
+		self._tail = []
+
+	def _flush(self):
+		self._base = self._base._extend(PSequence._fromitems(self._tail))
+		self._tail = []
 
 	def persistent(self):
 		return self._seq
@@ -862,7 +1023,9 @@ class Evolver(PSequenceEvolverBase[T]):
 	def __getitem__(self, index):
 		return self._seq.__getitem__(index)
 	def __len__(self) -> int:
-		return self._seq.__len__()
+		return self._base._size + len(self._tail)
+	def __contains__(self, value:object) -> bool:
+		return self._seq.__contains__(value)
 	def __iter__(self) -> Iterator[T]:
 		return self._seq.__iter__()
 	def __reversed__(self) -> Iterator[T]:
@@ -889,7 +1052,9 @@ class Evolver(PSequenceEvolverBase[T]):
 		self._seq = self._seq.appendleft(value)
 		return self
 	def appendright(self, value:T) -> Evolver[T]:
-		self._seq = self._seq.appendright(value)
+		tail = self._tail
+		tail.append(value)
+		if len(tail) >= Evolver._TAIL_SIZE: self._flush()
 		return self
 	append = appendright
 	def extendleft(self, other:Union[PSequence[T], Iterable[T]]) -> Evolver[T]:
@@ -928,7 +1093,23 @@ class Evolver(PSequenceEvolverBase[T]):
 		self._seq = self._seq.sort(*args, **kwargs)
 		return self
 
-EMPTY_SEQUENCE: PSequence[Any] = PSequence(PSequence._Type.Tree, 0, tuple())
+# bound once so the hot paths avoid the class and enum attribute lookups
+NODE = PSequence._Type.Node
+DIGIT = PSequence._Type.Digit
+TREE = PSequence._Type.Tree
+
+_new = object.__new__
+
+def _make(_type, _size, _items):
+	# same as PSequence(_type, _size, _items) without going through
+	# type.__call__ and PSequence.__new__, about twice as fast
+	self = _new(PSequence)
+	self._type = _type
+	self._size = _size
+	self._items = _items
+	return self
+
+EMPTY_SEQUENCE: PSequence[Any] = PSequence(TREE, 0, tuple())
 
 # for doctest
 def psequence(*args, **kwargs):
@@ -3,6 +3,7 @@ from typing import Any, Iterator, TypeVar, Optional, Union, Tuple, Callable
 from typing_extensions import Protocol
 
 import builtins
+import itertools
 import platform
 import os
 
@@ -14,11 +15,6 @@ class Comparable(Protocol):
 
 K = TypeVar('K', bound=Comparable)
 
-def compare_single(x:K, y:K, equality:bool) -> int:
-	if x == y: return 0
-	if equality or x < y: return -1
-	return 1
-
 def compare_next(xs:Iterator[Any], ys:Iterator[Any]) -> Union[int,Tuple[Any,Any]]:
 	try:
 		x = next(xs)
@@ -35,31 +31,38 @@ def compare_next(xs:Iterator[Any], ys:Iterator[Any]) -> Union[int,Tuple[Any,Any]
 		return 1
 	return x, y
 
+_missing = object()
+
 def compare_iter(xs:Any, ys:Any, equality:bool) -> int:
-	if equality:
-		if xs is ys: return 0
-		try:
-			xl, yl = len(xs), len(ys)
-			if xl != yl: return 1
-		except TypeError:
-			pass
+	if equality and xs is ys: return 0
+	try:
+		xl, yl = len(xs), len(ys)
+	except TypeError:
+		xl = yl = None
+	else:
+		if equality and xl != yl: return 1
 	try:
 		xs, ys = iter(xs), iter(ys)
 	except TypeError:
 		return NotImplemented
-	while True:
-		n = compare_next(xs, ys)
-		if isinstance(n, int): return n
-		c = compare_single(*n, equality)
-		if c != 0: return c
+	if xl is not None:
+		# lengths are known up front, so zip can drive both iterators
+		for x, y in zip(xs, ys):
+			if not x == y:
+				return -1 if equality or x < y else 1
+		return (xl > yl) - (xl < yl)
+	# otherwise pad the shorter one with a sentinel to spot where it ends
+	for x, y in itertools.zip_longest(xs, ys, fillvalue=_missing):
+		if x is _missing: return -1
+		if y is _missing: return 1
+		if not x == y:
+			return -1 if equality or x < y else 1
+	return 0
 
 def check_index(length:int, index:int) -> int:
-	idx = index
-	if idx < 0:
-		idx += length
-	if not (0 <= idx < length):
-		raise IndexError('index out of range: ' + str(index))
-	return idx
+	if 0 <= index < length: return index
+	if -length <= index < 0: return index + length
+	raise IndexError('index out of range: ' + str(index))
 
 sphinx_build: bool = getattr(builtins, '__sphinx_build__', False)
 
@@ -19,6 +19,10 @@ if platform.python_implementation() == 'CPython' and os.getenv('PYRSISTENT_SKIP_
             'pyrsistent_extras._psequence._c_ext',
             sources=['pyrsistent_extras/_psequence/_c_ext.c'],
         ),
+        setuptools.Extension(
+            'pyrsistent_extras._pheap_c',
+            sources=['pyrsistent_extras/_pheap_c.c'],
+        ),
     ]
 
 needs_pytest = {'pytest', 'test', 'ptr'}.intersection(sys.argv)
@@ -8,6 +8,8 @@ import collections
 import pickle
 import pytest
 import bisect
+import os
+import platform
 
 def pitems(keys=st.integers(), values=st.integers()):
 	return st.tuples(keys, values)
@@ -60,30 +62,56 @@ def check_tree(tree, down, tip, order, acc):
 	'''
 	check invariants of Tree
 	'''
-	if tree is None: return 0
-	if down: assert tree._key <= tip
-	else: assert tree._key >= tip
-	acc.append((tree._key, tree._value))
-	if order == 0:
-		assert tree._child is None
-		assert tree._sibling is None
-	else:
-		assert tree._child is not None
-	size1 = check_tree(tree._child, down, tree._key, order - 1, acc)
-	size2 = check_tree(tree._sibling, down, tip, order - 1, acc)
-	return size1 + size2 + 1
+	size = 0
+	# loop along the siblings, only recursing into children
+	while tree is not None:
+		if down: assert tree._key <= tip
+		else: assert tree._key >= tip
+		acc.append((tree._key, tree._value))
+		if order == 0:
+			assert tree._child is None
+			assert tree._sibling is None
+		else:
+			assert tree._child is not None
+		size += check_tree(tree._child, down, tree._key, order - 1, acc) + 1
+		tree, order = tree._sibling, order - 1
+	return size
 
 def check_forest(forest, down, tip, acc):
 	'''
 	check invariants of Forest
 	'''
-	if forest is None: return 0
-	assert forest._tree._sibling is None
-	size = check_tree(forest._tree, down, tip, forest._order, acc)
-	assert size == (1 << forest._order)
-	size += check_forest(forest._next, down, tip, acc)
+	size = 0
+	while forest is not None:
+		assert forest._tree._sibling is None
+		tsize = check_tree(forest._tree, down, tip, forest._order, acc)
+		assert tsize == (1 << forest._order)
+		size += tsize
+		forest = forest._next
 	return size
 
+def test_c_ext_malformed(): # pragma: no cover
+	if platform.python_implementation() != 'CPython' \
+			or os.environ.get('PYRSISTENT_NO_C_EXTENSION'):
+		pytest.skip()
+	from pyrsistent_extras._pheap_c import Tree, Forest
+	leaf = Tree(1, 1, None, None)
+	# forests built by hand must raise rather than crash
+	for order, next in [(-1, None), (64, None), (3, Forest(2, leaf, None))]:
+		with pytest.raises(ValueError):
+			Forest(order, leaf, next)
+	with pytest.raises(ValueError):
+		Forest(5, leaf, None).pop(True)
+	forest = None
+	for order in range(5000, 0, -1):
+		forest = Forest.push(forest, True, order, leaf)
+	with pytest.raises(ValueError):
+		forest.pop(True)
+	with pytest.raises(ValueError):
+		Forest.push(forest, True, 10000, leaf)
+	with pytest.raises(ValueError):
+		Forest.merge(forest, Forest.push(forest, True, 0, leaf), True)
+
 def check_heap(heap):
 	'''
 	check invariants of Heap
@@ -115,6 +143,11 @@ def test_types(heapitems):
 def test_hl_hg(items):
 	assert check_heap(hg(*items)) == check_heap(pmaxheap(items))
 	assert check_heap(hl(*items)) == check_heap(pminheap(items))
+	assert isinstance(hg(*items), PMaxHeap)
+	assert isinstance(hl(*items), PMinHeap)
+	if items:
+		assert hg(*items).peek()[0] == max(k for k, _ in items)
+		assert hl(*items).peek()[0] == min(k for k, _ in items)
 
 @given(pheaps())
 def test_fromkeys(heapitems):
@@ -196,6 +229,19 @@ def test_compare_int(args):
 	assert (heap1 <  heap2) == (items1 <  items2)
 	assert (heap1 >  heap2) == (items1 >  items2)
 
+@given(pheappairs(lambda heaps: heaps(items=smallitems())))
+def test_compare_ties(args):
+	heapitems1, heapitems2 = args
+	heap1, items1 = heapitems1
+	heap2, items2 = heapitems2
+	if heap1._down:
+		# keys descending, values with the same key still ascending
+		items1 = sorted(items1, key=lambda x: -x[0])
+		items2 = sorted(items2, key=lambda x: -x[0])
+	assert (heap1 == heap2) == (items1 == items2)
+	assert (heap1 <  heap2) == (items1 <  items2)
+	assert (heap1 >= heap2) == (items1 >= items2)
+
 @given(pheappairs(lambda heaps:
 	heaps(items=pitems(st.integers(1,4), st.just(None)))))
 def test_compare_none(args):
@@ -206,6 +252,16 @@ def test_compare_none(args):
 	assert (heap1 == heap2) == (items1 == items2)
 	assert (heap1 != heap2) == (items1 != items2)
 
+@given(pheappairs(lambda heaps:
+	heaps(items=pitems(st.integers(1,4), st.integers(1,2)))))
+def test_compare_hashed(args):
+	heapitems1, heapitems2 = args
+	heap1, items1 = heapitems1
+	heap2, items2 = heapitems2
+	hash(heap1) ; hash(heap2)
+	assert (heap1 == heap2) == (sorted(items1) == sorted(items2))
+	assert (heap1 != heap2) == (sorted(items1) != sorted(items2))
+
 @given(st.lists(smallitems()), st.lists(smallitems()))
 def test_compare_dict(items1, items2):
 	items1 = [(k, {v:None}) for k, v in sorted(items1)]
@@ -220,6 +276,14 @@ def test_hash(heapitems):
 	heap1, items = heapitems
 	heap2 = globals()[heap1._name](reversed(items))
 	assert hash(heap1) == hash(heap2)
+	# the hash is cached on the heap after the first call
+	assert heap1._hash == hash(heap1)
+
+@given(st.lists(smallitems()))
+def test_hash_unorderable(items):
+	items = [(k, complex(0, v)) for k, v in items]
+	assert hash(pminheap(items)) == hash(pminheap(reversed(items)))
+	assert hash(pmaxheap(items)) == hash(pmaxheap(reversed(items)))
 
 @given(pheaps())
 def test_repr(heapitems):
@@ -254,17 +318,27 @@ def test_keys(heapitems):
 	if heap._down:
 		keys = list(reversed(keys))
 	assert list(heap.keys()) == keys
+	assert sorted(heap.keys(False)) == [k for k, _ in items]
 	for k, v in items[:5] + items[-5:]:
 		assert k in heap.keys()
 		assert (k + 1 in heap.keys()) \
 			== any(n == k + 1 for n, _ in items)
 
+@given(pheaps(), st.integers())
+def test_keys_contains(heapitems, key):
+	heap, items = heapitems
+	assert (key in heap.keys()) == any(k == key for k, _ in items)
+	assert (key in heap.keys(False)) == any(k == key for k, _ in items)
+	assert (str(key) in heap.keys()) == False
+
 @given(pheaps())
 def test_values(heapitems):
 	heap, items = heapitems
 	assert len(heap.values()) == len(items)
 	assert collections.Counter(heap.values()) \
 		== collections.Counter(v for _, v in items)
+	assert collections.Counter(heap.values(False)) \
+		== collections.Counter(v for _, v in items)
 	for k, v in items[:5] + items[-5:]:
 		assert v in heap.values()
 		assert (v + 1 in heap.values()) \
@@ -284,4 +358,11 @@ def test_items(heapitems):
 		assert ((k, v + 1) in heap.items()) \
 			== any(n == (k, v + 1) for n in items)
 
+@given(st.lists(smallitems(), min_size=20, max_size=80))
+def test_items_sorted_large(items):
+	for heap, down in ((pminheap(items), False), (pmaxheap(items), True)):
+		keys = sorted((k for k, _ in items), reverse=down)
+		assert [k for k, _ in heap.items()] == keys
+		assert sorted(heap.items()) == sorted(items)
+
 # vim: set foldmethod=marker:
@@ -445,6 +445,8 @@ def test_set_slice(iseqitems:IndexSeq, update:list):
 	assert check_seq(seq.set(slice(None, stop), update)) == copy
 	copy = items[:] ; copy[start:stop] = update
 	assert check_seq(seq.set(slice(start, stop), update)) == copy
+	with pytest.raises(TypeError):
+		seq.set(slice(start, stop), 0)
 
 @given(indexseqs(count=2))
 @check_garbage
@@ -841,6 +843,39 @@ def test_evolver_appendright(item:int, seqitems:PSequence):
 	evo.appendright(item)
 	assert check_seq(evo) == items + [item]
 
+@given(psequences(), st.lists(st.integers()))
+@check_garbage
+def test_evolver_append_snapshots(seqitems:PSequence, extra:list):
+	seq, items = seqitems
+	evo = seq.evolver()
+	snapshots = []
+	for item in extra:
+		evo.appendright(item)
+		evo.appendleft(item)
+		items = [item] + items + [item]
+		snapshots.append((evo.persistent(), items))
+		hash(snapshots[-1][0])
+	for snapshot, expect in snapshots:
+		assert check_seq(snapshot) == expect
+		assert hash(snapshot) == hash(tuple(expect))
+	for item in extra:
+		evo.appendright(item)
+		items = items + [item]
+		assert hash(evo.persistent()) == hash(tuple(items))
+	assert check_seq(evo) == items
+
+@given(psequences(), st.integers(min_value=0, max_value=200), st.integers())
+@check_garbage
+def test_evolver_append_buffered(seqitems:PSequence, count:int, item:int):
+	seq, items = seqitems
+	evo = seq.evolver()
+	for i in range(count):
+		evo.append(i)
+		assert len(evo) == len(items) + i + 1
+	evo.appendleft(item)
+	assert check_seq(evo) == [item] + items + list(range(count))
+	assert check_seq(seq) == items
+
 @given(psequences(), psequences())
 @check_garbage
 def test_evolver_extendleft(seqitems1:PSequence, seqitems2:PSequence):